@@ -1,14 +1,16 @@
 import vertexai
 import asyncio
+from functools import cache
+from typing import Optional
 from vertexai.generative_models import GenerativeModel, Tool, FunctionDeclaration
-from server import get_analysis
+import server
+from server import get_analysis, get_timeframe_reports
+from formatter import REPORT_SEPARATOR, format_multi_timeframe_lines, format_trend_scores
 
 # Initialize Vertex AI
 PROJECT_ID = "sp500trading"
 LOCATION = "us-central1" # You might want to ask the user for location or default to one
 
-vertexai.init(project=PROJECT_ID, location=LOCATION)
-
 # Define Tool Functions
 def get_crypto_analysis(symbol: str, exchange: str = "BINANCE", interval: str = "1d"):
     """Get technical analysis for a crypto pair."""
@@ -55,6 +57,15 @@ def get_commodity_analysis(symbol: str, exchange: str = "TVC", interval: str = "
     
     return asyncio.run(get_analysis(symbol, "cfd", exchange, interval))
 
+def get_trend_scores(symbols: list[str], screener: str = "crypto", exchange: str = "BINANCE", interval: str = "1d") -> str:
+    """Score the trend of several symbols on one exchange at once (bullish minus bearish signals, -5 to +5).
+    
+    Use this to compare or rank symbols, e.g. "which of these is most bullish?".
+    screener is 'crypto', 'america' (stocks/indexes), 'forex' or 'cfd' (commodities).
+    """
+    scores = asyncio.run(server.get_trend_scores(list(symbols), screener, exchange, interval))
+    return format_trend_scores(scores)
+
 def get_multi_timeframe_analysis(symbol: str, asset_type: str = "crypto", exchange: str = "BINANCE") -> str:
     """
     Get comprehensive technical analysis across multiple timeframes (5m, 15m, 30m, 1h) to provide 
@@ -71,8 +82,6 @@ def get_multi_timeframe_analysis(symbol: str, asset_type: str = "crypto", exchan
     Returns:
         Detailed multi-timeframe analysis with trend direction, key levels, and trading signals.
     """
-    import time
-    import asyncio
     from datetime import datetime, timedelta
     
     # Map asset types to screeners
@@ -100,20 +109,10 @@ def get_multi_timeframe_analysis(symbol: str, asset_type: str = "crypto", exchan
     screener = screener_map.get(asset_type, "crypto")
     
     timeframes = ["5m", "15m", "30m", "1h"]
-    results = {}
-    
     start_time = datetime.now()
     
-    for i, tf in enumerate(timeframes):
-        try:
-            # Add delay between requests to avoid rate limiting (except for first request)
-            if i > 0:
-                time.sleep(3)  # Wait 3 seconds between requests
-            
-            analysis_text = asyncio.run(get_analysis(symbol, screener, exchange, tf))
-            results[tf] = analysis_text
-        except Exception as e:
-            results[tf] = f"Error: {str(e)}"
+    # One batched request; timeframes it misses wait for rate limit capacity
+    reports = asyncio.run(get_timeframe_reports(symbol, screener, exchange, timeframes))
     
     end_time = datetime.now()
     elapsed_time = (end_time - start_time).total_seconds()
@@ -122,21 +121,32 @@ def get_multi_timeframe_analysis(symbol: str, asset_type: str = "crypto", exchan
     next_analysis_time = end_time + timedelta(minutes=2)
     
     # Format output
-    output = f"Multi-Timeframe Analysis for {symbol} on {exchange}\n"
-    output += "=" * 60 + "\n\n"
-    
-    for tf, result in results.items():
-        output += f"--- {tf.upper()} Timeframe ---\n"
-        output += result + "\n\n"
+    parts = format_multi_timeframe_lines(symbol, exchange, reports)
     
     # Add rate limiting info
-    output += "=" * 60 + "\n"
-    output += f"Analysis completed in {elapsed_time:.1f} seconds\n"
-    output += f"⏰ RATE LIMIT INFO: To avoid API errors, wait until {next_analysis_time.strftime('%H:%M:%S')} "
-    output += f"(~2 minutes) before requesting another multi-timeframe analysis.\n"
-    output += "Single timeframe requests can be made immediately.\n"
-    
-    return output
+    parts.extend([
+        REPORT_SEPARATOR,
+        f"Analysis completed in {elapsed_time:.1f} seconds",
+        f"⏰ RATE LIMIT INFO: To avoid API errors, wait until {next_analysis_time.strftime('%H:%M:%S')} "
+        "(~2 minutes) before requesting another multi-timeframe analysis.",
+        "Single timeframe requests can be made immediately.",
+        "",
+    ])
+    return "\n".join(parts)
+
+# Symbols supported by get_parabolic_sar_signal
+SUPPORTED_SYMBOLS = {
+    "SPX": {"asset_type": "index", "exchange": "CBOE", "screener": "america"},
+    "USOIL": {"asset_type": "commodity", "exchange": "TVC", "screener": "cfd"},
+    "XAUUSD": {"asset_type": "forex", "exchange": "FX_IDC", "screener": "cfd"},
+    "BTCUSDT": {"asset_type": "crypto", "exchange": "BINANCE", "screener": "crypto"},
+    "COIN": {"asset_type": "stock", "exchange": "NASDAQ", "screener": "america"},
+    "USDJPY": {"asset_type": "forex", "exchange": "FX_IDC", "screener": "forex"}
+}
+
+# Symbols the web app analyzes; tool calls for anything else are rejected
+# before any model round-trip or API request
+ALLOWED_SYMBOLS = frozenset(SUPPORTED_SYMBOLS)
 
 def get_parabolic_sar_signal(symbol: str, asset_type: str = "crypto", exchange: str = "BINANCE") -> str:
     """
@@ -161,16 +171,6 @@ def get_parabolic_sar_signal(symbol: str, asset_type: str = "crypto", exchange:
     from datetime import datetime, timedelta
     from server import get_analysis_data  # We'll need raw data, not formatted text
     
-    # Supported symbols only
-    SUPPORTED_SYMBOLS = {
-        "SPX": {"asset_type": "index", "exchange": "CBOE", "screener": "america"},
-        "USOIL": {"asset_type": "commodity", "exchange": "TVC", "screener": "cfd"},
-        "XAUUSD": {"asset_type": "forex", "exchange": "FX_IDC", "screener": "cfd"},
-        "BTCUSDT": {"asset_type": "crypto", "exchange": "BINANCE", "screener": "crypto"},
-        "COIN": {"asset_type": "stock", "exchange": "NASDAQ", "screener": "america"},
-        "USDJPY": {"asset_type": "forex", "exchange": "FX_IDC", "screener": "forex"}
-    }
-    
     # Validate symbol
     if symbol not in SUPPORTED_SYMBOLS:
         supported_list = ", ".join(SUPPORTED_SYMBOLS.keys())
@@ -609,27 +609,73 @@ before making any trading decisions.
     
     return output
 
-# Define Function Declarations
-get_crypto_analysis_func = FunctionDeclaration.from_func(get_crypto_analysis)
-get_stock_analysis_func = FunctionDeclaration.from_func(get_stock_analysis)
-get_forex_analysis_func = FunctionDeclaration.from_func(get_forex_analysis)
-get_index_analysis_func = FunctionDeclaration.from_func(get_index_analysis)
-get_commodity_analysis_func = FunctionDeclaration.from_func(get_commodity_analysis)
-get_multi_timeframe_analysis_func = FunctionDeclaration.from_func(get_multi_timeframe_analysis)
-get_parabolic_sar_signal_func = FunctionDeclaration.from_func(get_parabolic_sar_signal)
-
-# Create the tools list
-tools = Tool(
-    function_declarations=[
-        get_crypto_analysis_func,
-        get_stock_analysis_func,
-        get_forex_analysis_func,
-        get_index_analysis_func,
-        get_commodity_analysis_func,
-        get_multi_timeframe_analysis_func,
-        get_parabolic_sar_signal_func,
-    ]
-)
+# Tool name (as called by the model) -> function
+TOOL_FUNCTIONS = {
+    func.__name__: func
+    for func in (
+        get_crypto_analysis,
+        get_stock_analysis,
+        get_forex_analysis,
+        get_index_analysis,
+        get_commodity_analysis,
+        get_multi_timeframe_analysis,
+        get_parabolic_sar_signal,
+        get_trend_scores,
+    )
+}
+
+def call_tool(function_name: str, function_args, allowed_symbols: Optional[frozenset] = None) -> str:
+    """
+    Run the tool the model asked for.
+    
+    Args:
+        function_name: Tool name
+        function_args: Tool arguments
+        allowed_symbols: If given, calls for other symbols are answered
+            without running the tool
+        
+    Returns:
+        Tool result (None for unknown tools)
+    """
+    func = TOOL_FUNCTIONS.get(function_name)
+    if func is None:
+        return None
+    
+    if allowed_symbols is not None:
+        symbols = function_args.get("symbols") or [function_args.get("symbol")]
+        unsupported = [symbol for symbol in symbols if symbol not in allowed_symbols]
+        if unsupported:
+            return f"UNSUPPORTED SYMBOL: {', '.join(map(str, unsupported))}. Supported symbols: {', '.join(SUPPORTED_SYMBOLS)}"
+    
+    return func(**function_args)
+
+def call_tools(function_calls, allowed_symbols: Optional[frozenset] = None) -> list:
+    """
+    Run several model tool calls concurrently (each in a worker thread).
+    
+    Args:
+        function_calls: Function calls from the model response
+        allowed_symbols: Passed to call_tool
+        
+    Returns:
+        Results in the same order as function_calls
+    """
+    async def run_all():
+        return await asyncio.gather(
+            *[asyncio.to_thread(call_tool, fc.name, fc.args, allowed_symbols) for fc in function_calls]
+        )
+    
+    return asyncio.run(run_all())
+
+@cache
+def _get_tools() -> Tool:
+    """Initialize Vertex AI and build the tool declarations on first use."""
+    vertexai.init(project=PROJECT_ID, location=LOCATION)
+
+    # Define Function Declarations and create the tools list
+    return Tool(
+        function_declarations=[FunctionDeclaration.from_func(func) for func in TOOL_FUNCTIONS.values()]
+    )
 
 def create_chat():
     # Initialize the model with tools and system instruction
@@ -658,7 +704,7 @@ You are equipped with professional trading tools - use them confidently to help
 
     model = GenerativeModel(
         "gemini-2.5-flash",
-        tools=[tools],
+        tools=[_get_tools()],
         system_instruction=system_instruction
     )
     return model.start_chat()
@@ -693,31 +739,16 @@ def main():
                 function_responses = []
                 
                 for function_call in function_calls:
-                    function_name = function_call.name
-                    function_args = function_call.args
-                    
-                    print(f"Agent is calling tool: {function_name} with args: {function_args}")
-                    
-                    result = None
-                    if function_name == "get_crypto_analysis":
-                        result = get_crypto_analysis(**function_args)
-                    elif function_name == "get_stock_analysis":
-                        result = get_stock_analysis(**function_args)
-                    elif function_name == "get_forex_analysis":
-                        result = get_forex_analysis(**function_args)
-                    elif function_name == "get_index_analysis":
-                        result = get_index_analysis(**function_args)
-                    elif function_name == "get_commodity_analysis":
-                        result = get_commodity_analysis(**function_args)
-                    elif function_name == "get_multi_timeframe_analysis":
-                        result = get_multi_timeframe_analysis(**function_args)
-                    elif function_name == "get_parabolic_sar_signal":
-                        result = get_parabolic_sar_signal(**function_args)
-                    
+                    print(f"Agent is calling tool: {function_call.name} with args: {function_call.args}")
+                
+                # Independent tool calls run at the same time
+                results = call_tools(function_calls)
+                
+                for function_call, result in zip(function_calls, results):
                     if result:
                         function_responses.append(
                             vertexai.generative_models.Part.from_function_response(
-                                name=function_name,
+                                name=function_call.name,
                                 response={"content": result}
                             )
                         )
@@ -8,6 +8,7 @@ import logging
 from datetime import datetime
 from flask import Flask, jsonify
 from server import get_analysis_data
+from rate_limiter import rate_limiter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -53,6 +54,9 @@ async def cache_update():
         # Fetch each timeframe
         for timeframe in BACKGROUND_TIMEFRAMES:
             try:
+                # Wait for rate limit capacity rather than falling back to stale cache
+                await rate_limiter.wait_for_slot()
+                
                 # This will fetch and cache the data
                 data = await get_analysis_data(symbol, screener, exchange, timeframe)
                 
@@ -64,16 +68,10 @@ async def cache_update():
                     logger.warning(error_msg)
                     results["errors"].append(error_msg)
                 
-                # Small delay between requests to avoid hitting rate limits
-                await asyncio.sleep(1)
-                
             except Exception as e:
                 error_msg = f"Error caching {symbol} {timeframe}: {str(e)}"
                 logger.error(error_msg)
                 results["errors"].append(error_msg)
-        
-        # Delay between symbols
-        await asyncio.sleep(2)
     
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
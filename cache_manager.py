@@ -3,15 +3,87 @@ Cache manager that orchestrates hot and cold tier storage.
 Implements intelligent caching with gap detection and data aggregation.
 """
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional, Tuple
-from models import Bar, CacheKey, TimeRange, DataGap, Interval
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional, Tuple, Union
+from models import Bar, BarBatch, CacheKey, TimeRange, DataGap, Interval
 from firestore_storage import firestore_storage
 from gcs_storage import gcs_storage
 from config import config
 
 logger = logging.getLogger(__name__)
 
+class HotKeyTracker:
+    """
+    Tracks which cache keys are read often, using two LRU queues (2Q-style).
+    
+    - cold_queue: recently read keys with an access score that halves every
+      SCORE_HALF_LIFE seconds; reads within MIN_READ_INTERVAL of the last
+      counted read are one burst and add nothing
+    - hot_queue: keys whose score reached PROMOTE_SCORE
+    When the hot queue is full its least recently read key is demoted.
+    
+    hot_tier_days still decides where bars are stored; a hot key only keeps
+    its older bars in the hot tier as well.
+    """
+    
+    MIN_READ_INTERVAL = 60.0
+    SCORE_HALF_LIFE = 3600.0
+    PROMOTE_SCORE = 2.5
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.hot_queue: OrderedDict = OrderedDict()
+        self.cold_queue: OrderedDict = OrderedDict()
+    
+    def _add_cold(self, key: str, score: float, last_read: float):
+        """Add or refresh a key at the newest end of the cold queue."""
+        self.cold_queue[key] = (score, last_read)
+        self.cold_queue.move_to_end(key)
+        while len(self.cold_queue) > self.capacity * 4:
+            self.cold_queue.popitem(last=False)
+    
+    def record_access(self, key: str, now: Optional[float] = None):
+        """
+        Record a read of key, promoting it to hot once its score is high enough.
+        
+        Args:
+            key: Cache key that was read
+            now: Monotonic time of the read (defaults to time.monotonic())
+        """
+        if now is None:
+            now = time.monotonic()
+        
+        if key in self.hot_queue:
+            self.hot_queue[key] = now
+            self.hot_queue.move_to_end(key)
+            return
+        
+        score, last_read = self.cold_queue.get(key, (0.0, None))
+        if last_read is None:
+            score, last_read = 1.0, now
+        elif now - last_read >= self.MIN_READ_INTERVAL:
+            score = score * 0.5 ** ((now - last_read) / self.SCORE_HALF_LIFE) + 1.0
+            last_read = now
+        
+        if score < self.PROMOTE_SCORE:
+            self._add_cold(key, score, last_read)
+            return
+        
+        self.cold_queue.pop(key, None)
+        self.hot_queue[key] = now
+        logger.debug(f"Promoted {key} to hot keys")
+        
+        if len(self.hot_queue) > self.capacity:
+            demoted, demoted_read = self.hot_queue.popitem(last=False)
+            self._add_cold(demoted, 1.0, demoted_read)
+            logger.debug(f"Demoted {demoted} from hot keys")
+    
+    def is_hot(self, key: str) -> bool:
+        """Check if key is currently hot."""
+        return key in self.hot_queue
+
 class CacheManager:
     """
     Manages caching across hot (Firestore) and cold (GCS) tiers.
@@ -19,6 +91,7 @@ class CacheManager:
     Implements:
     - Cache lookup with gap detection
     - Automatic tier selection based on data age
+    - Keeping older bars of frequently read keys in the hot tier
     - Data migration between tiers
     - Server-side timeframe aggregation
     """
@@ -28,28 +101,23 @@ class CacheManager:
         self.cold_storage = gcs_storage
         self.enabled = config.enable_cache
         self.hot_tier_days = config.cache.hot_tier_days
+        self.hot_keys = HotKeyTracker(config.cache.hot_keys_max)
         
         logger.info(f"CacheManager initialized: cache_enabled={self.enabled}, "
                    f"hot_tier_days={self.hot_tier_days}")
     
+    def _hot_tier_cutoff(self) -> int:
+        """Unix timestamp before which bars belong to the cold tier."""
+        return int(time.time()) - self.hot_tier_days * 86400
+    
     def _is_hot_tier(self, timestamp: int) -> bool:
         """Determine if timestamp should be in hot tier."""
-        cutoff = datetime.now() - timedelta(days=self.hot_tier_days)
-        cutoff_timestamp = int(cutoff.timestamp())
-        return timestamp >= cutoff_timestamp
+        return timestamp >= self._hot_tier_cutoff()
     
-    def _partition_bars_by_tier(self, bars: List[Bar]) -> Tuple[List[Bar], List[Bar]]:
+    def _partition_bars_by_tier(self, bars: BarBatch) -> Tuple[BarBatch, BarBatch]:
         """Partition bars into hot and cold tier based on age."""
-        hot_bars = []
-        cold_bars = []
-        
-        for bar in bars:
-            if self._is_hot_tier(bar.timestamp):
-                hot_bars.append(bar)
-            else:
-                cold_bars.append(bar)
-        
-        return hot_bars, cold_bars
+        is_hot = bars.timestamps >= self._hot_tier_cutoff()
+        return bars.select(is_hot), bars.select(~is_hot)
     
     async def get(self, cache_key: CacheKey, time_range: TimeRange) -> Optional[List[Bar]]:
         """
@@ -66,6 +134,10 @@ class CacheManager:
             return None
         
         try:
+            key_str = cache_key.to_string()
+            self.hot_keys.record_access(key_str)
+            is_hot_key = self.hot_keys.is_hot(key_str)
+            
             all_bars = []
             
             # Try hot tier first
@@ -76,10 +148,15 @@ class CacheManager:
             
             # Check if we need to query cold tier
             # (if requested range extends beyond hot tier threshold)
-            cutoff = datetime.now() - timedelta(days=self.hot_tier_days)
-            cutoff_timestamp = int(cutoff.timestamp())
+            cutoff_timestamp = self._hot_tier_cutoff()
+            
+            # Hot keys may already hold their older bars in the hot tier
+            covered_by_hot = bool(
+                is_hot_key and hot_bars and
+                hot_bars[0].timestamp <= time_range.start_timestamp + self._get_interval_seconds(cache_key.interval)
+            )
             
-            if time_range.start_timestamp < cutoff_timestamp:
+            if time_range.start_timestamp < cutoff_timestamp and not covered_by_hot:
                 # Query cold tier for older data
                 cold_time_range = TimeRange(
                     start_timestamp=time_range.start_timestamp,
@@ -90,6 +167,10 @@ class CacheManager:
                 if cold_bars:
                     all_bars.extend(cold_bars)
                     logger.debug(f"Found {len(cold_bars)} bars in cold tier")
+                    
+                    # Copy older bars of hot keys into the hot tier for the next read
+                    if is_hot_key:
+                        await self.hot_storage.store(cache_key, BarBatch.from_bars(cold_bars))
             
             if all_bars:
                 # Sort and deduplicate by timestamp
@@ -105,28 +186,45 @@ class CacheManager:
             logger.error(f"Error retrieving from cache: {e}")
             return None
     
-    async def put(self, cache_key: CacheKey, bars: List[Bar]) -> bool:
+    async def put(
+        self,
+        cache_key: CacheKey,
+        bars: Union[BarBatch, List[Bar]],
+        check_existing: bool = False
+    ) -> bool:
         """
         Store bars in cache, automatically partitioning by tier.
         
+        Writes are blind by default: cold-tier month blobs are overwritten
+        without reading them first. Use verify() to check stored data.
+        
         Args:
             cache_key: Cache key identifying the data
-            bars: List of bars to store
+            bars: Columnar batch of bars (a list of bars is converted)
+            check_existing: Merge with bars already in the cold tier instead
+                of overwriting them (one extra read per month)
             
         Returns:
             True if successful, False otherwise
         """
-        if not self.enabled or not bars:
+        if not self.enabled or not len(bars):
             return False
         
         try:
+            if not isinstance(bars, BarBatch):
+                bars = BarBatch.from_bars(bars)
+            
             # Partition bars by tier
             hot_bars, cold_bars = self._partition_bars_by_tier(bars)
             
             success = True
             
+            # Hot keys keep all their bars in the hot tier (old bars also go to cold)
+            if self.hot_keys.is_hot(cache_key.to_string()):
+                hot_bars = bars
+            
             # Store hot tier data
-            if hot_bars:
+            if len(hot_bars):
                 hot_success = await self.hot_storage.store(cache_key, hot_bars)
                 if hot_success:
                     logger.info(f"Stored {len(hot_bars)} bars in hot tier")
@@ -135,8 +233,10 @@ class CacheManager:
                     success = False
             
             # Store cold tier data
-            if cold_bars:
-                cold_success = await self.cold_storage.store(cache_key, cold_bars)
+            if len(cold_bars):
+                cold_success = await self.cold_storage.store(
+                    cache_key, cold_bars, merge_existing=check_existing
+                )
                 if cold_success:
                     logger.info(f"Stored {len(cold_bars)} bars in cold tier")
                 else:
@@ -149,6 +249,35 @@ class CacheManager:
             logger.error(f"Error storing in cache: {e}")
             return False
     
+    async def verify(self, cache_key: CacheKey, bars: Union[BarBatch, List[Bar]]) -> List[int]:
+        """
+        Read back the time range covered by bars and compare it with them.
+        
+        Args:
+            cache_key: Cache key identifying the data
+            bars: Bars expected to be in the cache
+            
+        Returns:
+            Timestamps of bars that are missing from the cache or differ
+            from the cached values (empty when everything matches)
+        """
+        if not len(bars):
+            return []
+        
+        if not isinstance(bars, BarBatch):
+            bars = BarBatch.from_bars(bars)
+        
+        time_range = TimeRange(
+            start_timestamp=int(bars.timestamps.min()),
+            end_timestamp=int(bars.timestamps.max())
+        )
+        cached = {bar.timestamp: bar for bar in (await self.get(cache_key, time_range) or [])}
+        
+        mismatched = [bar.timestamp for bar in bars.to_bars() if cached.get(bar.timestamp) != bar]
+        if mismatched:
+            logger.warning(f"Cache verify: {len(mismatched)} of {len(bars)} bars differ for {cache_key.to_string()}")
+        return mismatched
+    
     async def find_gaps(self, cache_key: CacheKey, requested_range: TimeRange) -> List[DataGap]:
         """
         Find gaps in cached data that need to be fetched from API.
@@ -175,39 +304,42 @@ class CacheManager:
             
             # Find gaps in the cached data
             gaps = []
-            cached_timestamps = sorted([bar.timestamp for bar in cached_bars])
+            cached_timestamps = np.sort(np.fromiter(
+                (bar.timestamp for bar in cached_bars), dtype=np.int64, count=len(cached_bars)
+            ))
+            first_timestamp = int(cached_timestamps[0])
+            last_timestamp = int(cached_timestamps[-1])
             
             # Check for gap at the beginning
-            if cached_timestamps[0] > requested_range.start_timestamp:
+            if first_timestamp > requested_range.start_timestamp:
                 gaps.append(DataGap(
                     cache_key=cache_key,
                     time_range=TimeRange(
                         start_timestamp=requested_range.start_timestamp,
-                        end_timestamp=cached_timestamps[0] - 1
+                        end_timestamp=first_timestamp - 1
                     )
                 ))
             
             # Check for gaps in the middle
             # (This is simplified - in production, you'd calculate expected interval)
             interval_seconds = self._get_interval_seconds(cache_key.interval)
-            for i in range(len(cached_timestamps) - 1):
-                gap_size = cached_timestamps[i + 1] - cached_timestamps[i]
-                # If gap is larger than 2x the interval, consider it a gap
-                if gap_size > interval_seconds * 2:
-                    gaps.append(DataGap(
-                        cache_key=cache_key,
-                        time_range=TimeRange(
-                            start_timestamp=cached_timestamps[i] + interval_seconds,
-                            end_timestamp=cached_timestamps[i + 1] - interval_seconds
-                        )
-                    ))
+            # If gap is larger than 2x the interval, consider it a gap
+            gap_starts = np.flatnonzero(np.diff(cached_timestamps) > interval_seconds * 2)
+            for i in gap_starts.tolist():
+                gaps.append(DataGap(
+                    cache_key=cache_key,
+                    time_range=TimeRange(
+                        start_timestamp=int(cached_timestamps[i]) + interval_seconds,
+                        end_timestamp=int(cached_timestamps[i + 1]) - interval_seconds
+                    )
+                ))
             
             # Check for gap at the end
-            if cached_timestamps[-1] < requested_range.end_timestamp:
+            if last_timestamp < requested_range.end_timestamp:
                 gaps.append(DataGap(
                     cache_key=cache_key,
                     time_range=TimeRange(
-                        start_timestamp=cached_timestamps[-1] + 1,
+                        start_timestamp=last_timestamp + 1,
                         end_timestamp=requested_range.end_timestamp
                     )
                 ))
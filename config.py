@@ -23,17 +23,62 @@ class CacheConfig:
     # Cold tier: data older than 3 months in GCS Nearline
     cold_tier_days: int = 90
     
+    # Frequently read keys keep their older bars in the hot tier too
+    hot_keys_max: int = 256
+    
     # Cache TTL for different timeframes (in seconds)
     ttl_1m: int = 60  # 1 minute bars cached for 1 minute
     ttl_5m: int = 300  # 5 minute bars cached for 5 minutes
     ttl_15m: int = 900  # 15 minute bars cached for 15 minutes
     ttl_30m: int = 1800  # 30 minute bars cached for 30 minutes
     ttl_1h: int = 3600  # 1 hour bars cached for 1 hour
+    ttl_4h: int = 14400  # 4 hour bars cached for 4 hours
     ttl_1d: int = 86400  # Daily bars cached for 24 hours
     
+    # TTL for live data (indicator responses and the reports built from
+    # them), in seconds; well under a bar so "Current Price" stays fresh
+    live_ttl_1m: int = 30
+    live_ttl_5m: int = 60
+    live_ttl_15m: int = 120
+    live_ttl_30m: int = 180
+    live_ttl_1h: int = 300
+    live_ttl_4h: int = 600
+    live_ttl_1d: int = 900
+    
     # Maximum bars to request per API call
     max_bars_per_request: int = 5000
     
+    # Local disk cache (survives process restarts)
+    disk_cache_path: str = "cache.sqlite"
+    disk_cache_max_mb: int = 200
+    
+    # In-process indicator cache (entries, one per symbol/exchange/interval)
+    memory_cache_max_entries: int = 1024
+    
+    def ttl_for(self, interval: str) -> int:
+        """Get cache TTL in seconds for an interval string (e.g. '15m')."""
+        ttl_map = {
+            "1m": self.ttl_1m,
+            "5m": self.ttl_5m,
+            "15m": self.ttl_15m,
+            "30m": self.ttl_30m,
+            "1h": self.ttl_1h,
+            "4h": self.ttl_4h,
+        }
+        return ttl_map.get(interval, self.ttl_1d)
+    
+    def live_ttl_for(self, interval: str) -> int:
+        """Get the live data TTL in seconds for an interval string (e.g. '15m')."""
+        ttl_map = {
+            "1m": self.live_ttl_1m,
+            "5m": self.live_ttl_5m,
+            "15m": self.live_ttl_15m,
+            "30m": self.live_ttl_30m,
+            "1h": self.live_ttl_1h,
+            "4h": self.live_ttl_4h,
+        }
+        return ttl_map.get(interval, self.live_ttl_1d)
+    
 @dataclass
 class RateLimitConfig:
     """Rate limiting configuration."""
@@ -49,6 +94,9 @@ class RateLimitConfig:
     # Request queue settings
     queue_max_size: int = 1000
     request_timeout_seconds: int = 30
+    
+    # Shared backend for multi-worker deployments ("memory" or a redis:// URL)
+    backend: str = "memory"
 
 @dataclass
 class AppConfig:
@@ -65,6 +113,9 @@ class AppConfig:
     
     # Logging level
     log_level: str = "INFO"
+    
+    # Port for the Prometheus /metrics endpoint (0 disables it)
+    metrics_port: int = 9100
 
 # Default configuration instance
 def get_config() -> AppConfig:
@@ -79,14 +130,20 @@ def get_config() -> AppConfig:
         cache=CacheConfig(
             hot_tier_days=int(os.getenv("HOT_TIER_DAYS", "90")),
             cold_tier_days=int(os.getenv("COLD_TIER_DAYS", "90")),
+            hot_keys_max=int(os.getenv("HOT_KEYS_MAX", "256")),
+            disk_cache_path=os.getenv("DISK_CACHE_PATH", "cache.sqlite"),
+            disk_cache_max_mb=int(os.getenv("DISK_CACHE_MAX_MB", "200")),
+            memory_cache_max_entries=int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "1024")),
         ),
         rate_limit=RateLimitConfig(
             max_requests_per_minute=int(os.getenv("MAX_REQUESTS_PER_MINUTE", "50")),
             max_requests_per_hour=int(os.getenv("MAX_REQUESTS_PER_HOUR", "2000")),
+            backend=os.getenv("TV_RATE_LIMIT_BACKEND", "memory"),
         ),
         enable_cache=os.getenv("ENABLE_CACHE", "true").lower() == "true",
         enable_rate_limiting=os.getenv("ENABLE_RATE_LIMITING", "true").lower() == "true",
         log_level=os.getenv("LOG_LEVEL", "INFO"),
+        metrics_port=int(os.getenv("METRICS_PORT", "9100")),
     )
 
 # Global config instance
@@ -2,13 +2,20 @@
 Data fetcher with caching and rate limiting integration.
 Wraps TradingView API calls with intelligent caching.
 """
+import asyncio
+import json
 import logging
 from datetime import datetime
-from typing import List, Optional
-from tradingview_ta import TA_Handler, Interval as TVInterval
+from typing import Dict, List, Optional
+from tradingview_ta import TA_Handler, Analysis, TradingView, Interval as TVInterval, __version__ as tv_version
+import tradingview_ta.main as tv_main
+import tv_session  # noqa: F401 - shares one keep-alive session across TradingView calls
 
-from models import Bar, CacheKey, TimeRange, Interval
+from models import Bar, TimeRange, Interval, make_key
 from cache_manager import cache_manager
+from disk_cache import disk_cache
+from memory_cache import MemoryCache
+from metrics import BATCH_SIZE
 from rate_limiter import rate_limiter, RateLimitExceeded
 from config import config
 
@@ -40,6 +47,70 @@ STRING_INTERVAL_MAP = {
     "1M": Interval.ONE_MONTH,
 }
 
+# Interval string -> tradingview_ta interval, resolved once instead of per call
+STRING_TV_INTERVAL_MAP = {
+    interval: TV_INTERVAL_MAP[interval_enum]
+    for interval, interval_enum in STRING_INTERVAL_MAP.items()
+}
+
+def scan_intervals(symbol: str, screener: str, exchange: str, intervals: List[str]) -> Dict[str, Analysis]:
+    """
+    Fetch one symbol's analysis for several intervals in a single scanner request.
+    The scanner takes per-interval columns (e.g. "RSI|15"), so the columns
+    for every interval are concatenated into one POST and split on return.
+    Blocking; run it in a worker thread.
+    
+    Args:
+        symbol: Trading symbol
+        screener: Market screener
+        exchange: Exchange name
+        intervals: Timeframe interval strings
+        
+    Returns:
+        Dictionary of {interval: Analysis}; intervals without data are omitted
+    """
+    indicators_key = TradingView.indicators.copy()
+    ticker = f"{exchange}:{symbol}"
+    tv_intervals = [
+        STRING_TV_INTERVAL_MAP.get(interval, TVInterval.INTERVAL_1_DAY)
+        for interval in intervals
+    ]
+    
+    columns = []
+    for tv_interval in tv_intervals:
+        columns.extend(TradingView.data([ticker], tv_interval, indicators_key)["columns"])
+    payload = {"symbols": {"tickers": [ticker.upper()], "query": {"types": []}}, "columns": columns}
+    
+    # tv_main.requests is the shared session installed by tv_session
+    response = tv_main.requests.post(
+        f"{TradingView.scan_url}{screener.lower()}/scan",
+        json=payload,
+        headers={"User-Agent": f"tradingview_ta/{tv_version}"}
+    )
+    if response.status_code != 200:
+        raise Exception(f"Can't access TradingView's API. HTTP status code: {response.status_code}.")
+    
+    result = json.loads(response.text)["data"]
+    if not result:
+        raise Exception("Exchange or symbol not found.")
+    
+    values = result[0]["d"]
+    width = len(indicators_key)
+    analyses = {}
+    for i, (interval, tv_interval) in enumerate(zip(intervals, tv_intervals)):
+        indicators = dict(zip(indicators_key, values[i * width:(i + 1) * width]))
+        analysis = tv_main.calculate(
+            indicators=indicators,
+            indicators_key=indicators_key,
+            screener=screener,
+            symbol=symbol,
+            exchange=exchange,
+            interval=tv_interval
+        )
+        if analysis is not None:
+            analyses[interval] = analysis
+    return analyses
+
 class DataFetcher:
     """
     Fetches market data with caching and rate limiting.
@@ -49,19 +120,118 @@ class DataFetcher:
     2. Uses rate limiter for all external requests
     3. Stores retrieved data in cache
     4. Handles cache misses gracefully
+    5. Keeps indicator responses in memory for one bar interval
     """
     
     def __init__(self):
         self.cache = cache_manager
+        self.disk_cache = disk_cache
         self.rate_limiter = rate_limiter
+        self.analysis_cache = MemoryCache(maxsize=config.cache.memory_cache_max_entries, name="analyses")
         logger.info("DataFetcher initialized")
     
+    async def fetch_analysis(
+        self,
+        symbol: str,
+        screener: str,
+        exchange: str,
+        interval: str,
+        force_refresh: bool = False
+    ) -> Analysis:
+        """
+        Fetch the full TradingView analysis (OHLCV and indicators) with rate limiting.
+        Responses are kept in memory for one bar interval, so the bar and
+        indicator lookups for a request share a single API call.
+        
+        Args:
+            symbol: Trading symbol
+            screener: Market screener
+            exchange: Exchange name
+            interval: Timeframe interval string
+            force_refresh: Bypass the in-memory cache and always call the API
+            
+        Returns:
+            tradingview_ta Analysis
+            
+        Raises:
+            RateLimitExceeded: If the rate limit is hit
+        """
+        key = (symbol, screener, exchange, interval)
+        if config.enable_cache and not force_refresh:
+            analysis = self.analysis_cache.get(key)
+            if analysis is not None:
+                logger.debug(f"Memory cache hit for {symbol} {interval}")
+                return analysis
+        
+        tv_interval = STRING_TV_INTERVAL_MAP.get(interval, TVInterval.INTERVAL_1_DAY)
+        
+        async def fetch():
+            """Inner function to be rate limited."""
+            handler = TA_Handler(
+                symbol=symbol,
+                screener=screener,
+                exchange=exchange,
+                interval=tv_interval
+            )
+            # Blocking HTTP call; run in a thread so concurrent fetches overlap
+            return await asyncio.to_thread(handler.get_analysis)
+        
+        analysis = await self.rate_limiter.execute(fetch)
+        
+        if config.enable_cache:
+            self.analysis_cache.put(key, analysis, config.cache.live_ttl_for(interval))
+        
+        return analysis
+    
+    async def prefetch_analyses(self, symbol: str, screener: str, exchange: str, intervals: List[str]) -> int:
+        """
+        Load the in-memory analysis cache for several intervals with one
+        rate-limited API call, so the per-interval lookups that follow are hits.
+        
+        Args:
+            symbol: Trading symbol
+            screener: Market screener
+            exchange: Exchange name
+            intervals: Timeframe interval strings
+            
+        Returns:
+            Number of intervals fetched (0 if the batch failed; each interval
+            is then fetched on its own as usual)
+        """
+        if not config.enable_cache:
+            return 0
+        
+        missing = [
+            interval for interval in intervals
+            if self.analysis_cache.get((symbol, screener, exchange, interval)) is None
+        ]
+        if not missing:
+            return 0
+        
+        async def fetch():
+            """Inner function to be rate limited."""
+            return await asyncio.to_thread(scan_intervals, symbol, screener, exchange, missing)
+        
+        try:
+            analyses = await self.rate_limiter.execute(fetch)
+        except Exception as e:
+            logger.warning(f"Batched fetch for {symbol} {missing} failed, falling back to per-interval requests: {e}")
+            return 0
+        
+        for interval, analysis in analyses.items():
+            self.analysis_cache.put((symbol, screener, exchange, interval), analysis, config.cache.live_ttl_for(interval))
+        
+        BATCH_SIZE.observe(len(analyses))
+        logger.info(f"Fetched {len(analyses)}/{len(missing)} intervals for {symbol} in one request")
+        return len(analyses)
+    
     async def get_current_bar(
         self,
         symbol: str,
         screener: str,
         exchange: str,
-        interval: str
+        interval: str,
+        force_refresh: bool = False
     ) -> Optional[Bar]:
         """
         Get the current bar for a symbol.
@@ -72,6 +242,7 @@ class DataFetcher:
             screener: Market screener (crypto, america, forex, etc.)
             exchange: Exchange name
             interval: Timeframe interval
+            force_refresh: Skip cached bars and fetch from the API
             
         Returns:
             Current bar or None if error
@@ -81,12 +252,7 @@ class DataFetcher:
             interval_enum = STRING_INTERVAL_MAP.get(interval, Interval.ONE_DAY)
             
             # Create cache key
-            cache_key = CacheKey(
-                symbol=symbol,
-                screener=screener,
-                exchange=exchange,
-                interval=interval_enum
-            )
+            cache_key = make_key(symbol, screener, exchange, interval_enum)
             
             # Check cache first
             now = int(datetime.now().timestamp())
@@ -95,7 +261,7 @@ class DataFetcher:
                 end_timestamp=now
             )
             
-            cached_bars = await self.cache.get(cache_key, time_range)
+            cached_bars = None if force_refresh else await self.cache.get(cache_key, time_range)
             
             if cached_bars:
                 # Return most recent bar
@@ -104,7 +270,7 @@ class DataFetcher:
             
             # Cache miss - fetch from API with rate limiting
             logger.info(f"Cache miss for {symbol} {interval}, fetching from API")
-            bar = await self._fetch_from_api(symbol, screener, exchange, interval_enum)
+            bar = await self._fetch_from_api(symbol, screener, exchange, interval, force_refresh)
             
             if bar:
                 # Store in cache
@@ -121,7 +287,8 @@ class DataFetcher:
         symbol: str,
         screener: str,
         exchange: str,
-        interval: Interval
+        interval: str,
+        force_refresh: bool = False
     ) -> Optional[Bar]:
         """
         Fetch current bar from TradingView API with rate limiting.
@@ -130,28 +297,19 @@ class DataFetcher:
             symbol: Trading symbol
             screener: Market screener
             exchange: Exchange name
-            interval: Timeframe interval
+            interval: Timeframe interval string
+            force_refresh: Bypass the in-memory analysis cache
             
         Returns:
             Current bar or None if error
         """
-        async def fetch():
-            """Inner function to be rate limited."""
-            tv_interval = TV_INTERVAL_MAP.get(interval, TVInterval.INTERVAL_1_DAY)
-            
-            handler = TA_Handler(
-                symbol=symbol,
-                screener=screener,
-                exchange=exchange,
-                interval=tv_interval
-            )
-            
-            analysis = handler.get_analysis()
+        try:
+            analysis = await self.fetch_analysis(symbol, screener, exchange, interval, force_refresh)
             
             # Extract OHLCV data
             timestamp = int(datetime.now().timestamp())
             
-            return Bar(
+            bar = Bar(
                 timestamp=timestamp,
                 open=analysis.indicators.get('open', 0),
                 high=analysis.indicators.get('high', 0),
@@ -159,11 +317,7 @@ class DataFetcher:
                 close=analysis.indicators.get('close', 0),
                 volume=analysis.indicators.get('volume', 0)
             )
-        
-        try:
-            # Execute with rate limiting
-            bar = await self.rate_limiter.execute(fetch)
-            logger.info(f"Fetched bar from API: {symbol} {interval.value}")
+            logger.info(f"Fetched bar from API: {symbol} {interval}")
             return bar
             
         except Exception as e:
@@ -175,17 +329,20 @@ class DataFetcher:
         symbol: str,
         screener: str,
         exchange: str,
-        interval: str
+        interval: str,
+        force_refresh: bool = False
     ) -> dict:
         """
         Get analysis data with caching.
         This is a drop-in replacement for the original get_analysis_data function.
+        Checks the local disk cache before going to the API.
         
         Args:
             symbol: Trading symbol
             screener: Market screener
             exchange: Exchange name
             interval: Timeframe interval string
+            force_refresh: Skip all caches and fetch fresh data from the API
             
         Returns:
             Dictionary with analysis data (includes 'from_cache' and 'cache_warning' keys if using cached data)
@@ -193,29 +350,27 @@ class DataFetcher:
         try:
             # Convert interval string to our Interval enum
             interval_enum = STRING_INTERVAL_MAP.get(interval, Interval.ONE_DAY)
-            tv_interval = TV_INTERVAL_MAP.get(interval_enum, TVInterval.INTERVAL_1_DAY)
+            
+            # Check the disk cache for a result that is still within its TTL
+            disk_key = make_key(symbol, screener, exchange, interval_enum).to_string()
+            
+            cached_result = None if force_refresh else await self.disk_cache.get(disk_key)
+            if cached_result is not None:
+                logger.info(f"Disk cache hit for {symbol} {interval}")
+                return cached_result
             
             # Try to get fresh data from API
             try:
                 # Get current bar (with caching)
-                bar = await self.get_current_bar(symbol, screener, exchange, interval)
+                bar = await self.get_current_bar(symbol, screener, exchange, interval, force_refresh)
                 
                 if not bar:
                     # Try to get from cache only
                     return await self._get_cached_analysis_only(symbol, screener, exchange, interval)
                 
-                # Fetch full analysis from API (this includes indicators)
-                async def fetch_analysis():
-                    handler = TA_Handler(
-                        symbol=symbol,
-                        screener=screener,
-                        exchange=exchange,
-                        interval=tv_interval
-                    )
-                    return handler.get_analysis()
-                
-                # Execute with rate limiting
-                analysis = await self.rate_limiter.execute(fetch_analysis)
+                # Fetch full analysis (this includes indicators); on a bar cache miss
+                # this reuses the response fetched for the bar
+                analysis = await self.fetch_analysis(symbol, screener, exchange, interval)
                 
                 # Return fresh analysis data
                 result = {
@@ -245,6 +400,8 @@ class DataFetcher:
                         price_change = close * change / 100
                         result['fi'] = price_change * bar.volume
                 
+                await self.disk_cache.put(disk_key, result, config.cache.live_ttl_for(interval))
+                
                 return result
                 
             except RateLimitExceeded as e:
@@ -274,12 +431,7 @@ class DataFetcher:
             interval_enum = STRING_INTERVAL_MAP.get(interval, Interval.ONE_DAY)
             
             # Create cache key
-            cache_key = CacheKey(
-                symbol=symbol,
-                screener=screener,
-                exchange=exchange,
-                interval=interval_enum
-            )
+            cache_key = make_key(symbol, screener, exchange, interval_enum)
             
             # Try to get cached data
             now = int(datetime.now().timestamp())
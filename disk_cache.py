@@ -0,0 +1,142 @@
+"""
+Local disk cache for analysis results using SQLite.
+Keeps recent TradingView responses across process restarts so a restart
+doesn't spend rate-limit budget re-fetching data that is still fresh.
+"""
+import asyncio
+import logging
+import pickle
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from typing import Any, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """
+    Key/value cache with per-entry expiry stored in a local SQLite file.
+
+    Data structure:
+    - Table: cache (key TEXT PRIMARY KEY, expires REAL, payload BLOB)
+    - Payload: zlib-compressed pickle of the cached value
+
+    All SQLite work runs in a worker thread so the event loop is never blocked.
+    """
+
+    # Check the database size once every this many writes
+    SIZE_CHECK_INTERVAL = 100
+
+    def __init__(self):
+        self.enabled = config.enable_cache
+        self.path = config.cache.disk_cache_path
+        self.max_bytes = config.cache.disk_cache_max_mb * 1024 * 1024
+        self._writes = 0
+
+        if self.enabled:
+            try:
+                self._initialize()
+                logger.info(f"DiskCache initialized: path={self.path}, max={config.cache.disk_cache_max_mb}MB")
+            except Exception as e:
+                logger.error(f"Failed to initialize disk cache: {e}")
+                self.enabled = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache database."""
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _initialize(self):
+        """Create the cache table and drop expired entries."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, expires REAL, payload BLOB)"
+            )
+            deleted = conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),)).rowcount
+        if deleted:
+            logger.info(f"Removed {deleted} expired disk cache entries")
+
+    def _get(self, key: str) -> Optional[Any]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT payload FROM cache WHERE key = ? AND expires >= ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def _put(self, key: str, value: Any, ttl: float):
+        payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, expires, payload) VALUES (?, ?, ?)",
+                (key, time.time() + ttl, payload)
+            )
+
+        self._writes += 1
+        if self._writes % self.SIZE_CHECK_INTERVAL == 0:
+            self._enforce_size_limit()
+
+    def _enforce_size_limit(self):
+        """Evict expired entries, then the soonest-to-expire half if still over the size limit."""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+
+            if page_count * page_size > self.max_bytes:
+                conn.execute(
+                    "DELETE FROM cache WHERE key IN "
+                    "(SELECT key FROM cache ORDER BY expires LIMIT (SELECT COUNT(*) / 2 FROM cache))"
+                )
+                conn.commit()
+                conn.execute("VACUUM")
+                logger.info(f"Disk cache exceeded {self.max_bytes // (1024 * 1024)}MB, evicted oldest entries")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except Exception as e:
+            logger.error(f"Error reading disk cache: {e}")
+            return None
+
+    async def put(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        Store a value in the cache.
+
+        Args:
+            key: Cache key
+            value: Picklable value to store
+            ttl: Time to live in seconds
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.enabled:
+            return False
+
+        try:
+            await asyncio.to_thread(self._put, key, value, ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing disk cache: {e}")
+            return False
+
+# Global disk cache instance
+disk_cache = DiskCache()
@@ -1,4 +1,5 @@
 from tradingview_ta import TA_Handler, Interval
+import tv_session  # noqa: F401 - shares one keep-alive session across TradingView calls
 
 def test(symbol, screener, exchange):
     try:
@@ -2,17 +2,35 @@
 Hot tier storage implementation using Cloud Firestore.
 Stores recent data (last 3 months) for fast access.
 """
+import asyncio
 import logging
+import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Optional
+import google.auth
+from google.auth.transport.requests import Request
 from google.cloud import firestore
 from google.api_core import exceptions as gcp_exceptions
+from google.api_core import retry as gcp_retry
 
 from config import config
-from models import Bar, CacheKey, TimeRange, CachedData
+from models import Bar, BarBatch, CacheKey, TimeRange, CachedData
 
 logger = logging.getLogger(__name__)
 
+# Firestore allows at most 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+# Batched set(merge=True) writes are idempotent, so transient failures are safe to retry
+COMMIT_RETRY = gcp_retry.Retry(
+    predicate=gcp_retry.if_exception_type(
+        gcp_exceptions.Aborted,
+        gcp_exceptions.DeadlineExceeded,
+        gcp_exceptions.ServiceUnavailable,
+    ),
+    timeout=60.0,
+)
+
 class FirestoreStorage:
     """
     Hot tier storage using Cloud Firestore.
@@ -20,23 +38,35 @@ class FirestoreStorage:
     Data structure:
     - Collection: market_data
     - Document ID: {screener}:{exchange}:{symbol}:{interval}:{date}
-    - Fields: bars (array), cached_at, tier
+    - Fields: columns (BarBatch.to_bytes), bar_count, cached_at, tier
+      (documents written before the columnar format hold a bars array instead)
     """
     
     def __init__(self):
         """Initialize Firestore client."""
         try:
+            credentials, _ = google.auth.default(scopes=firestore.Client.SCOPE)
             self.db = firestore.Client(
                 project=config.gcp.project_id,
-                database=config.gcp.firestore_database
+                database=config.gcp.firestore_database,
+                credentials=credentials
             )
             self.collection = self.db.collection("market_data")
+            self._prefetch_token(credentials)
             logger.info(f"Firestore initialized: project={config.gcp.project_id}")
         except Exception as e:
             logger.error(f"Failed to initialize Firestore: {e}")
             self.db = None
             self.collection = None
     
+    def _prefetch_token(self, credentials):
+        """Fetch an access token now so the first read/write doesn't wait for it."""
+        try:
+            credentials.refresh(Request())
+        except Exception as e:
+            # The client refreshes lazily on first use instead
+            logger.warning(f"Could not prefetch Firestore credentials: {e}")
+    
     def _get_document_id(self, cache_key: CacheKey, date: datetime) -> str:
         """Generate document ID for a specific date."""
         date_str = date.strftime("%Y-%m-%d")
@@ -46,35 +76,41 @@ class FirestoreStorage:
         """Convert Unix timestamp to date."""
         return datetime.fromtimestamp(timestamp).replace(hour=0, minute=0, second=0, microsecond=0)
     
-    async def store(self, cache_key: CacheKey, bars: List[Bar]) -> bool:
+    def _batch_from_document(self, data: dict) -> BarBatch:
+        """Decode the bars stored in a document (columnar or legacy array format)."""
+        if "columns" in data:
+            return BarBatch.from_bytes(data["columns"])
+        return BarBatch.from_bars([Bar.from_dict(bar) for bar in data.get("bars", [])])
+    
+    async def store(self, cache_key: CacheKey, bars: BarBatch) -> bool:
         """
         Store bars in Firestore, partitioned by date.
         
         Args:
             cache_key: Cache key identifying the data
-            bars: List of bars to store
+            bars: Columnar batch of bars to store
             
         Returns:
             True if successful, False otherwise
         """
-        if not self.db or not bars:
+        if not self.db or not len(bars):
             return False
         
         try:
             # Group bars by date
-            bars_by_date = {}
-            for bar in bars:
-                date = self._get_date_from_timestamp(bar.timestamp)
-                date_key = date.strftime("%Y-%m-%d")
-                if date_key not in bars_by_date:
-                    bars_by_date[date_key] = []
-                bars_by_date[date_key].append(bar)
-            
-            # Store each date's bars in a separate document
-            batch = self.db.batch()
+            date_keys = np.array([
+                self._get_date_from_timestamp(ts).strftime("%Y-%m-%d") for ts in bars.timestamps.tolist()
+            ])
+            bars_by_date = {date_key: bars.select(date_keys == date_key) for date_key in np.unique(date_keys)}
+            
+            # Store each date's bars in a separate document, at most 500 per batch
+            batches = []
             current_time = int(datetime.now().timestamp())
             
-            for date_str, date_bars in bars_by_date.items():
+            for i, (date_str, date_bars) in enumerate(bars_by_date.items()):
+                if i % MAX_BATCH_WRITES == 0:
+                    batches.append(self.db.batch())
+                
                 date = datetime.strptime(date_str, "%Y-%m-%d")
                 doc_id = self._get_document_id(cache_key, date)
                 doc_ref = self.collection.document(doc_id)
@@ -82,14 +118,18 @@ class FirestoreStorage:
                 data = {
                     "cache_key": cache_key.to_string(),
                     "date": date_str,
-                    "bars": [bar.to_dict() for bar in date_bars],
+                    "columns": date_bars.sorted_unique().to_bytes(),
+                    "bar_count": len(date_bars),
                     "cached_at": current_time,
                     "tier": "hot"
                 }
                 
-                batch.set(doc_ref, data, merge=True)
+                batches[-1].set(doc_ref, data, merge=True)
             
-            batch.commit()
+            # Commit batches concurrently in worker threads so the event loop isn't blocked
+            await asyncio.gather(*[
+                asyncio.to_thread(batch.commit, retry=COMMIT_RETRY) for batch in batches
+            ])
             logger.info(f"Stored {len(bars)} bars across {len(bars_by_date)} documents for {cache_key.to_string()}")
             return True
             
@@ -126,14 +166,12 @@ class FirestoreStorage:
                 doc = doc_ref.get()
                 
                 if doc.exists:
-                    data = doc.to_dict()
-                    bars_data = data.get("bars", [])
+                    batch = self._batch_from_document(doc.to_dict())
                     
                     # Filter bars within the time range
-                    for bar_dict in bars_data:
-                        bar = Bar.from_dict(bar_dict)
-                        if time_range.contains(bar.timestamp):
-                            all_bars.append(bar)
+                    in_range = ((batch.timestamps >= time_range.start_timestamp) &
+                                (batch.timestamps <= time_range.end_timestamp))
+                    all_bars.extend(batch.select(in_range).to_bars())
                 
                 current_date += timedelta(days=1)
             
@@ -179,8 +217,7 @@ class FirestoreStorage:
                 batch.delete(doc.reference)
                 batch_size += 1
                 
-                # Firestore batch limit is 500
-                if batch_size >= 500:
+                if batch_size >= MAX_BATCH_WRITES:
                     batch.commit()
                     deleted_count += batch_size
                     batch = self.db.batch()
@@ -218,14 +255,12 @@ class FirestoreStorage:
             
             ranges = []
             for doc in docs:
-                data = doc.to_dict()
-                bars_data = data.get("bars", [])
+                timestamps = self._batch_from_document(doc.to_dict()).timestamps
                 
-                if bars_data:
-                    timestamps = [bar["timestamp"] for bar in bars_data]
+                if len(timestamps):
                     ranges.append(TimeRange(
-                        start_timestamp=min(timestamps),
-                        end_timestamp=max(timestamps)
+                        start_timestamp=int(timestamps.min()),
+                        end_timestamp=int(timestamps.max())
                     ))
             
             return ranges
@@ -0,0 +1,296 @@
+"""
+Report formatting for TradingView technical analysis.
+Pure functions (no I/O) that turn analysis data into the text returned to clients.
+
+All locals are annotated so the module can be compiled ahead of time with
+mypyc (`mypyc formatter.py`); the plain-Python module is used when no
+compiled extension is present.
+"""
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from tradingview_ta import Analysis
+
+
+# Fixed skeleton of the full report, split into the sections returned to
+# clients; conditional lines are pre-rendered strings (empty when the
+# indicator is unavailable)
+_HEADER_TEMPLATE = (
+    "Analysis for {symbol} on {exchange} ({interval}):\n"
+    "Recommendation: {recommendation}\n"
+    "Buy: {buy}, Sell: {sell}, Neutral: {neutral}\n\n"
+)
+
+_CANDLE_TEMPLATE = (
+    "Candle Analysis:\n"
+    "{candle_direction}"
+    "Open: {open}, Close: {close}, High: {high}, Low: {low}\n"
+    "{body_size}"
+    "\n"
+)
+
+_INDICATORS_TEMPLATE = (
+    "Oscillators:\n"
+    "Recommendation: {oscillators_recommendation}\n"
+    "{rsi}"
+    "{macd}"
+    "\nMoving Averages:\n"
+    "Recommendation: {moving_averages_recommendation}\n"
+    "{ema20}"
+    "{sma50}"
+    "{sma200}"
+    "\nTrend Indicators:\n"
+    "{psar}"
+    "{adx}"
+    "{ao}"
+)
+
+_TREND_TEMPLATE = (
+    "\n📊 TREND DIRECTION:\n"
+    "{trend}"
+)
+
+_BODY_SECTIONS = (_CANDLE_TEMPLATE, _INDICATORS_TEMPLATE, _TREND_TEMPLATE)
+
+# Simplified report used when only cached OHLC data is available
+_CACHED_REPORT_TEMPLATE = (
+    "Analysis for {symbol} on {exchange} ({interval}) [FROM CACHE]:\n\n"
+    "Basic Price Data:\n"
+    "Open: {open}, Close: {close}, High: {high}, Low: {low}\n"
+    "\nCandle Analysis:\n"
+    "{candle_direction}"
+    "{body_size}"
+    "\n⚠️ Full technical indicators unavailable due to rate limiting.\n"
+    "Please wait a moment and try again for complete analysis.\n"
+)
+
+# Rule under multi-timeframe report headers
+REPORT_SEPARATOR = "=" * 60
+
+
+@lru_cache(maxsize=256)
+def _header_template(symbol: str, exchange: str, interval: str) -> str:
+    """Header template with the symbol, exchange and interval already filled in."""
+    def escape(value: str) -> str:
+        return value.replace("{", "{{").replace("}", "}}")
+
+    return _HEADER_TEMPLATE.format_map({
+        "symbol": escape(symbol),
+        "exchange": escape(exchange),
+        "interval": escape(interval),
+        "recommendation": "{recommendation}",
+        "buy": "{buy}",
+        "sell": "{sell}",
+        "neutral": "{neutral}",
+    })
+
+
+def _candle_lines(open_price: float, close_price: float, high_price: float, low_price: float) -> Tuple[str, str]:
+    """Render the candle direction and body size lines."""
+    candle_body: float
+    candle_direction: str
+    if close_price > open_price:
+        candle_body = close_price - open_price
+        candle_direction = "🟢 Bullish Candle (Close > Open)\n"
+    elif close_price < open_price:
+        candle_body = open_price - close_price
+        candle_direction = "🔴 Bearish Candle (Close < Open)\n"
+    else:
+        candle_body = 0
+        candle_direction = "⚪ Doji Candle (Close = Open)\n"
+
+    body_size: str = ""
+    if candle_body > 0:
+        candle_range: float = high_price - low_price
+        body_percentage: float = (candle_body / candle_range * 100) if candle_range > 0 else 0
+        body_size = f"Body size: {candle_body:.2f} ({body_percentage:.1f}% of range)\n"
+
+    return candle_direction, body_size
+
+
+def format_analysis(analysis: Analysis, symbol: str, exchange: str, interval: str) -> str:
+    """
+    Format a full TradingView analysis (summary, candle, oscillators,
+    moving averages, trend indicators and overall trend direction).
+    """
+    return "".join(format_analysis_sections(analysis, symbol, exchange, interval))
+
+
+def format_analysis_sections(analysis: Analysis, symbol: str, exchange: str, interval: str) -> List[str]:
+    """
+    Format a full TradingView analysis as separate sections
+    (header, candle, indicators, trend direction) that join to the full report.
+    """
+    # Read indicators once; both the display and scoring blocks reuse these
+    ind: dict = analysis.indicators
+    rsi: Optional[float] = ind.get('RSI')
+    psar: Optional[float] = ind.get('P.SAR')
+    ao: Optional[float] = ind.get('AO')
+    ao_prev: float = ind.get('AO[1]', 0)
+
+    # Get candle data
+    open_price: float = ind.get('open', 0)
+    close_price: float = ind.get('close', 0)
+    high_price: float = ind.get('high', 0)
+    low_price: float = ind.get('low', 0)
+
+    candle_direction, body_size = _candle_lines(open_price, close_price, high_price, low_price)
+
+    rsi_line: str = ""
+    if rsi is not None:
+        if rsi > 70:
+            rsi_line = f"RSI: {rsi:.2f} (Overbought - Bearish)\n"
+        elif rsi < 30:
+            rsi_line = f"RSI: {rsi:.2f} (Oversold - Bullish)\n"
+        else:
+            rsi_line = f"RSI: {rsi:.2f} (Neutral)\n"
+
+    # Add Parabolic SAR
+    psar_line: str = ""
+    if psar is not None:
+        if close_price > psar:
+            psar_line = f"Parabolic SAR: {psar:.2f} (Price above SAR - Bullish trend)\n"
+        else:
+            psar_line = f"Parabolic SAR: {psar:.2f} (Price below SAR - Bearish trend)\n"
+
+    # Add ADX (Average Directional Index)
+    adx_line: str = ""
+    if 'ADX' in ind:
+        adx: float = ind['ADX']
+        if adx > 25:
+            adx_line = f"ADX: {adx:.2f} (Strong trend)\n"
+        elif adx > 20:
+            adx_line = f"ADX: {adx:.2f} (Developing trend)\n"
+        else:
+            adx_line = f"ADX: {adx:.2f} (Weak/No trend)\n"
+
+    # Add Awesome Oscillator (instead of Force Index)
+    ao_line: str = ""
+    if ao is not None:
+        if ao > 0 and ao > ao_prev:
+            ao_line = f"Awesome Oscillator: {ao:.2f} (Bullish momentum increasing)\n"
+        elif ao > 0:
+            ao_line = f"Awesome Oscillator: {ao:.2f} (Bullish momentum)\n"
+        elif ao < 0 and ao < ao_prev:
+            ao_line = f"Awesome Oscillator: {ao:.2f} (Bearish momentum increasing)\n"
+        else:
+            ao_line = f"Awesome Oscillator: {ao:.2f} (Bearish momentum)\n"
+
+    # Overall trend direction
+    bullish_signals: int = 0
+    bearish_signals: int = 0
+
+    # Count signals
+    if analysis.summary['RECOMMENDATION'] in ['BUY', 'STRONG_BUY']:
+        bullish_signals += 2
+    elif analysis.summary['RECOMMENDATION'] in ['SELL', 'STRONG_SELL']:
+        bearish_signals += 2
+
+    if rsi is not None:
+        if rsi < 30:
+            bullish_signals += 1
+        elif rsi > 70:
+            bearish_signals += 1
+
+    if psar is not None and 'close' in ind:
+        if close_price > psar:
+            bullish_signals += 1
+        else:
+            bearish_signals += 1
+
+    if ao is not None:
+        if ao > 0:
+            bullish_signals += 1
+        elif ao < 0:
+            bearish_signals += 1
+
+    trend_line: str
+    if bullish_signals > bearish_signals:
+        trend_line = f"🟢 BULLISH ({bullish_signals} bullish vs {bearish_signals} bearish signals)\n"
+    elif bearish_signals > bullish_signals:
+        trend_line = f"🔴 BEARISH ({bearish_signals} bearish vs {bullish_signals} bullish signals)\n"
+    else:
+        trend_line = f"⚪ NEUTRAL ({bullish_signals} bullish vs {bearish_signals} bullish signals)\n"
+
+    values: dict = {
+        "recommendation": analysis.summary['RECOMMENDATION'],
+        "buy": analysis.summary['BUY'],
+        "sell": analysis.summary['SELL'],
+        "neutral": analysis.summary['NEUTRAL'],
+        "candle_direction": candle_direction,
+        "open": f"{open_price:.2f}",
+        "close": f"{close_price:.2f}",
+        "high": f"{high_price:.2f}",
+        "low": f"{low_price:.2f}",
+        "body_size": body_size,
+        "oscillators_recommendation": analysis.oscillators['RECOMMENDATION'],
+        "rsi": rsi_line,
+        "macd": f"MACD: {ind['MACD.macd']:.2f}\n" if 'MACD.macd' in ind else "",
+        "moving_averages_recommendation": analysis.moving_averages['RECOMMENDATION'],
+        "ema20": f"EMA20: {ind['EMA20']:.2f}\n" if 'EMA20' in ind else "",
+        "sma50": f"SMA50: {ind['SMA50']:.2f}\n" if 'SMA50' in ind else "",
+        "sma200": f"SMA200: {ind['SMA200']:.2f}\n" if 'SMA200' in ind else "",
+        "psar": psar_line,
+        "adx": adx_line,
+        "ao": ao_line,
+        "trend": trend_line,
+    }
+    header: str = _header_template(symbol, exchange, interval).format_map(values)
+    return [header] + [template.format_map(values) for template in _BODY_SECTIONS]
+
+
+def format_cached_analysis(data: dict, symbol: str, exchange: str, interval: str) -> str:
+    """
+    Format the simplified OHLC-only report used when serving cached data.
+    """
+    open_price: float = data.get('open', 0)
+    close_price: float = data.get('close', 0)
+    high_price: float = data.get('high', 0)
+    low_price: float = data.get('low', 0)
+
+    candle_direction, body_size = _candle_lines(open_price, close_price, high_price, low_price)
+
+    return _CACHED_REPORT_TEMPLATE.format_map({
+        "symbol": symbol,
+        "exchange": exchange,
+        "interval": interval,
+        "open": f"{open_price:.2f}",
+        "close": f"{close_price:.2f}",
+        "high": f"{high_price:.2f}",
+        "low": f"{low_price:.2f}",
+        "candle_direction": candle_direction,
+        "body_size": body_size,
+    })
+
+def format_multi_timeframe_lines(symbol: str, exchange: str, reports: Dict[str, str]) -> List[str]:
+    """
+    Format per-timeframe reports as the lines of a multi-timeframe report.
+
+    Args:
+        reports: Dictionary of {timeframe: report text}, in display order
+
+    Returns:
+        Lines to join with "\n"; callers append any footer lines
+    """
+    lines: List[str] = [f"Multi-Timeframe Analysis for {symbol} on {exchange}", REPORT_SEPARATOR, ""]
+    timeframe: str
+    report: str
+    for timeframe, report in reports.items():
+        lines.append(f"--- {timeframe.upper()} Timeframe ---\n{report}\n")
+    return lines
+
+def format_trend_scores(scores: Dict[str, int]) -> str:
+    """
+    Format trend scores from a multi-symbol scan, most bullish first.
+
+    Args:
+        scores: Dictionary of {symbol: net score}
+    """
+    if not scores:
+        return "No trend scores available (no data returned for these symbols)."
+
+    lines: List[str] = ["Trend scores (bullish minus bearish signals, -5 to +5):"]
+    symbol: str
+    score: int
+    for symbol, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"{symbol}: {score:+d}")
+    return "\n".join(lines) + "\n"
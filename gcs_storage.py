@@ -2,25 +2,38 @@
 Cold tier storage implementation using Google Cloud Storage Nearline.
 Archives data older than 3 months for cost-effective long-term storage.
 """
+import io
 import logging
 import json
 from datetime import datetime, timedelta
 from typing import List, Optional
+import numpy as np
 from google.cloud import storage
 from google.api_core import exceptions as gcp_exceptions
 
 from config import config
-from models import Bar, CacheKey, TimeRange
+from models import Bar, BarBatch, CacheKey, TimeRange
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
 
 logger = logging.getLogger(__name__)
 
+# zstd level for month blobs (fast to decompress, ~level 6 gzip ratio)
+ZSTD_LEVEL = 3
+
 class GCSStorage:
     """
     Cold tier storage using GCS Nearline.
     
     Data structure:
     - Bucket: market-analyzer-cache
-    - Object path: {screener}/{exchange}/{symbol}/{interval}/{year}/{month}/data.json
+    - Object path: {screener}/{exchange}/{symbol}/{interval}/{year}/{month}/data.zst
+      (zstd-compressed BarBatch.to_bytes, bar count in blob metadata) when
+      zstandard is installed, otherwise data.npz (np.savez_compressed of the
+      BarBatch columns); older months may hold data.npz or data.json
     - Storage class: NEARLINE
     """
     
@@ -43,79 +56,107 @@ class GCSStorage:
                 self.bucket.storage_class = "NEARLINE"
                 self.bucket.patch()
                 logger.info(f"Created GCS bucket: {self.bucket_name} with NEARLINE storage")
+            
+            if zstd is None:
+                logger.warning("zstandard is not installed; new months are written as data.npz "
+                               "(install requirements.txt)")
                 
         except Exception as e:
             logger.error(f"Failed to initialize GCS: {e}")
             self.client = None
             self.bucket = None
     
-    def _get_blob_path(self, cache_key: CacheKey, year: int, month: int) -> str:
+    def _get_blob_path(self, cache_key: CacheKey, year: int, month: int, filename: str = "data.npz") -> str:
         """Generate blob path for a specific month."""
         return (f"{cache_key.screener}/{cache_key.exchange}/{cache_key.symbol}/"
-                f"{cache_key.interval.value}/{year}/{month:02d}/data.json")
+                f"{cache_key.interval.value}/{year}/{month:02d}/{filename}")
     
     def _get_month_from_timestamp(self, timestamp: int) -> tuple[int, int]:
         """Get year and month from timestamp."""
         dt = datetime.fromtimestamp(timestamp)
         return dt.year, dt.month
     
-    async def store(self, cache_key: CacheKey, bars: List[Bar]) -> bool:
+    def _load_month(self, cache_key: CacheKey, year: int, month: int) -> Optional[BarBatch]:
+        """
+        Load a month's bars, falling back to the npz and legacy JSON blobs.
+        A failed read is logged with the path of the blob being read and
+        treated as no data.
+        """
+        blob_path = self._get_blob_path(cache_key, year, month, "data.zst")
+        try:
+            if zstd is not None:
+                zst_blob = self.bucket.blob(blob_path)
+                if zst_blob.exists():
+                    return BarBatch.from_bytes(zstd.ZstdDecompressor().decompress(zst_blob.download_as_bytes()))
+            
+            blob_path = self._get_blob_path(cache_key, year, month)
+            blob = self.bucket.blob(blob_path)
+            if blob.exists():
+                with np.load(io.BytesIO(blob.download_as_bytes())) as columns:
+                    return BarBatch(*(columns[name] for name in BarBatch.COLUMNS))
+            
+            blob_path = self._get_blob_path(cache_key, year, month, "data.json")
+            legacy_blob = self.bucket.blob(blob_path)
+            if legacy_blob.exists():
+                data = json.loads(legacy_blob.download_as_string())
+                return BarBatch.from_bars([Bar.from_dict(b) for b in data.get("bars", [])])
+        
+        except Exception as e:
+            logger.warning(f"Failed to load data from {blob_path}: {e}")
+        
+        return None
+    
+    async def store(self, cache_key: CacheKey, bars: BarBatch, merge_existing: bool = False) -> bool:
         """
         Store bars in GCS, partitioned by month.
         
+        Each month blob is overwritten with the given bars; no read is done
+        before the write unless merge_existing is set.
+        
         Args:
             cache_key: Cache key identifying the data
-            bars: List of bars to store
+            bars: Columnar batch of bars to store
+            merge_existing: Read each month's existing blob and merge it with
+                the new bars (new bars win) instead of overwriting it
             
         Returns:
             True if successful, False otherwise
         """
-        if not self.bucket or not bars:
+        if not self.bucket or not len(bars):
             return False
         
         try:
             # Group bars by month
-            bars_by_month = {}
-            for bar in bars:
-                year, month = self._get_month_from_timestamp(bar.timestamp)
-                month_key = (year, month)
-                if month_key not in bars_by_month:
-                    bars_by_month[month_key] = []
-                bars_by_month[month_key].append(bar)
+            month_keys = np.array([
+                self._get_month_from_timestamp(ts) for ts in bars.timestamps.tolist()
+            ]).reshape(-1, 2)
             
             # Store each month's bars in a separate blob
-            for (year, month), month_bars in bars_by_month.items():
-                blob_path = self._get_blob_path(cache_key, year, month)
+            for year, month in np.unique(month_keys, axis=0).tolist():
+                month_bars = bars.select((month_keys[:, 0] == year) & (month_keys[:, 1] == month))
+                blob_path = self._get_blob_path(cache_key, year, month, "data.zst" if zstd is not None else "data.npz")
                 blob = self.bucket.blob(blob_path)
                 
-                # Check if blob already exists and merge data
-                existing_bars = []
-                if blob.exists():
-                    try:
-                        existing_data = json.loads(blob.download_as_string())
-                        existing_bars = [Bar.from_dict(b) for b in existing_data.get("bars", [])]
-                    except Exception as e:
-                        logger.warning(f"Failed to load existing data from {blob_path}: {e}")
+                batches = [month_bars]
+                if merge_existing:
+                    existing = self._load_month(cache_key, year, month)
+                    if existing is not None:
+                        batches.insert(0, existing)
                 
-                # Merge and deduplicate bars by timestamp
-                all_bars = existing_bars + month_bars
-                unique_bars = {bar.timestamp: bar for bar in all_bars}.values()
-                sorted_bars = sorted(unique_bars, key=lambda b: b.timestamp)
+                # Merge and deduplicate bars by timestamp (new bars win)
+                sorted_bars = BarBatch.concat(batches).sorted_unique()
                 
-                # Prepare data for storage
-                data = {
-                    "cache_key": cache_key.to_string(),
-                    "year": year,
-                    "month": month,
-                    "bars": [bar.to_dict() for bar in sorted_bars],
-                    "cached_at": int(datetime.now().timestamp()),
-                    "tier": "cold"
-                }
-                
-                # Upload to GCS
+                # Upload dense columns to GCS
+                if zstd is not None:
+                    payload = zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(sorted_bars.to_bytes())
+                    blob.metadata = {"bar_count": str(len(sorted_bars)), "layout": "BarBatch.to_bytes"}
+                else:
+                    buffer = io.BytesIO()
+                    np.savez_compressed(buffer, **{name: getattr(sorted_bars, name) for name in BarBatch.COLUMNS})
+                    payload = buffer.getvalue()
                 blob.upload_from_string(
-                    json.dumps(data),
-                    content_type="application/json"
+                    payload,
+                    content_type="application/octet-stream"
                 )
                 
                 # Set storage class to NEARLINE if not already
@@ -154,22 +195,12 @@ class GCSStorage:
             
             # Iterate through each month in the range
             while (current_year, current_month) <= (end_year, end_month):
-                blob_path = self._get_blob_path(cache_key, current_year, current_month)
-                blob = self.bucket.blob(blob_path)
-                
-                if blob.exists():
-                    try:
-                        data = json.loads(blob.download_as_string())
-                        bars_data = data.get("bars", [])
-                        
-                        # Filter bars within the time range
-                        for bar_dict in bars_data:
-                            bar = Bar.from_dict(bar_dict)
-                            if time_range.contains(bar.timestamp):
-                                all_bars.append(bar)
-                                
-                    except Exception as e:
-                        logger.warning(f"Failed to load data from {blob_path}: {e}")
+                batch = self._load_month(cache_key, current_year, current_month)
+                if batch is not None:
+                    # Filter bars within the time range
+                    in_range = ((batch.timestamps >= time_range.start_timestamp) &
+                                (batch.timestamps <= time_range.end_timestamp))
+                    all_bars.extend(batch.select(in_range).to_bars())
                 
                 # Move to next month
                 current_month += 1
@@ -201,7 +232,7 @@ class GCSStorage:
         Returns:
             True if successful, False otherwise
         """
-        return await self.store(cache_key, bars)
+        return await self.store(cache_key, BarBatch.from_bars(bars), merge_existing=True)
     
     async def list_cached_months(self, cache_key: CacheKey) -> List[tuple[int, int]]:
         """
@@ -0,0 +1,90 @@
+"""
+In-process LRU cache with per-entry expiry.
+Holds TradingView indicator responses so repeated lookups for the same
+symbol within one bar interval don't spend another API request.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from metrics import CACHE_HITS, CACHE_MISSES
+
+class MemoryCache:
+    """
+    Bounded key/value cache; the least recently used entry is evicted when full.
+
+    Data structure:
+    - OrderedDict of key -> (expires_at, value), most recently used last
+    - Expiry uses the monotonic clock
+    - A lock guards the OrderedDict; caches are shared by worker threads
+    - hits/misses count get() results; named caches also export them as
+      Prometheus counters labelled with the name
+    """
+
+    def __init__(self, maxsize: int = 1024, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.name = name
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if self.name is not None:
+            (CACHE_MISSES if entry is None else CACHE_HITS).labels(cache=self.name).inc()
+        return None if entry is None else entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: float):
+        """
+        Store a value in the cache.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time to live in seconds
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Get entry count and hit/miss statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
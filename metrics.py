@@ -0,0 +1,67 @@
+"""
+Prometheus metrics for the caching, batching and request-coalescing paths.
+Exported over HTTP by start_metrics_server() so TTLs and batch sizes can be
+tuned from real hit ratios.
+
+prometheus_client is listed in requirements.txt; if it is missing every
+metric is a no-op (with a warning when the server would start) and the
+in-process counters (MemoryCache.get_stats, server.cache_stats) still work.
+"""
+import logging
+
+try:
+    from prometheus_client import Counter, Histogram, start_http_server
+except ImportError:
+    Counter = None
+
+logger = logging.getLogger(__name__)
+
+class _NullMetric:
+    """Stand-in for a Prometheus metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs) -> "_NullMetric":
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+if Counter is not None:
+    CACHE_HITS = Counter("tv_cache_hits", "In-memory cache hits", ["cache"])
+    CACHE_MISSES = Counter("tv_cache_misses", "In-memory cache misses (absent or expired)", ["cache"])
+    BATCH_SIZE = Histogram(
+        "tv_batch_size",
+        "Intervals fetched per batched scanner request",
+        buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+    )
+    DEDUP_COALESCED = Counter("tv_dedup_coalesced", "get_analysis calls that joined an in-flight fetch")
+else:
+    CACHE_HITS = CACHE_MISSES = BATCH_SIZE = DEDUP_COALESCED = _NullMetric()
+
+def start_metrics_server(port: int) -> bool:
+    """
+    Serve /metrics on the given port from a background thread.
+
+    Args:
+        port: TCP port; 0 disables the server
+
+    Returns:
+        True if the server was started
+    """
+    if not port:
+        return False
+    if Counter is None:
+        logger.warning("prometheus_client is not installed; metrics are not exported "
+                       "(install requirements.txt)")
+        return False
+
+    try:
+        start_http_server(port)
+    except OSError as e:
+        logger.error(f"Error starting metrics server on port {port}: {e}")
+        return False
+
+    logger.info(f"Prometheus metrics served on port {port}")
+    return True
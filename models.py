@@ -3,8 +3,10 @@ Data models for time-series market data storage.
 """
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import ClassVar, Optional, List, Dict, Any
 from enum import Enum
+import numpy as np
 
 class Interval(str, Enum):
     """Supported timeframe intervals."""
@@ -38,8 +40,84 @@ class Bar:
         return cls(**data)
 
 @dataclass
+class BarBatch:
+    """
+    Columnar (structure-of-arrays) batch of OHLCV bars.
+    Timestamps are int64 Unix seconds; prices and volume are float64.
+    """
+    timestamps: np.ndarray
+    opens: np.ndarray
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray
+    volumes: np.ndarray
+    
+    # Column order used by Bar fields and the packed binary format
+    COLUMNS: ClassVar[tuple] = ("timestamps", "opens", "highs", "lows", "closes", "volumes")
+    BYTES_PER_BAR: ClassVar[int] = 48
+    
+    def __post_init__(self):
+        # Coerce dtypes and broadcast scalar columns to the batch length
+        columns = np.broadcast_arrays(
+            np.asarray(self.timestamps, dtype=np.int64),
+            *(np.asarray(getattr(self, name), dtype=np.float64) for name in self.COLUMNS[1:])
+        )
+        for name, column in zip(self.COLUMNS, columns):
+            setattr(self, name, column)
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    @classmethod
+    def from_bars(cls, bars: List[Bar]) -> 'BarBatch':
+        """Create a batch from a list of bars."""
+        return cls(
+            timestamps=[bar.timestamp for bar in bars],
+            opens=[bar.open for bar in bars],
+            highs=[bar.high for bar in bars],
+            lows=[bar.low for bar in bars],
+            closes=[bar.close for bar in bars],
+            volumes=[bar.volume for bar in bars]
+        )
+    
+    def to_bars(self) -> List[Bar]:
+        """Convert to a list of bars with plain Python values."""
+        return [Bar(*row) for row in zip(*(getattr(self, name).tolist() for name in self.COLUMNS))]
+    
+    def select(self, index) -> 'BarBatch':
+        """Select bars by boolean mask or index array."""
+        return BarBatch(*(getattr(self, name)[index] for name in self.COLUMNS))
+    
+    def sorted_unique(self) -> 'BarBatch':
+        """Sort by timestamp, keeping the last bar for duplicate timestamps."""
+        # np.unique keeps the first occurrence, so search the reversed columns
+        reversed_batch = self.select(slice(None, None, -1))
+        _, index = np.unique(reversed_batch.timestamps, return_index=True)
+        return reversed_batch.select(index)
+    
+    @classmethod
+    def concat(cls, batches: List['BarBatch']) -> 'BarBatch':
+        """Concatenate batches column by column."""
+        return cls(*(np.concatenate([getattr(b, name) for b in batches]) for name in cls.COLUMNS))
+    
+    def to_bytes(self) -> bytes:
+        """Pack into little-endian binary: all timestamps, then each value column."""
+        return b"".join(
+            getattr(self, name).astype("<i8" if name == "timestamps" else "<f8").tobytes()
+            for name in self.COLUMNS
+        )
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BarBatch':
+        """Unpack a batch written by to_bytes."""
+        n = len(data) // cls.BYTES_PER_BAR
+        timestamps = np.frombuffer(data, dtype="<i8", count=n)
+        values = np.frombuffer(data, dtype="<f8", offset=n * 8).reshape(5, n)
+        return cls(timestamps, *values)
+
+@dataclass(frozen=True, slots=True)
 class CacheKey:
-    """Unique identifier for cached data."""
+    """Unique identifier for cached data (immutable and hashable)."""
     symbol: str
     screener: str
     exchange: str
@@ -62,6 +140,11 @@ class CacheKey:
             interval=Interval(parts[3])
         )
 
+@lru_cache(maxsize=4096)
+def make_key(symbol: str, screener: str, exchange: str, interval: Interval) -> CacheKey:
+    """Get the (shared) CacheKey for the given fields."""
+    return CacheKey(symbol=symbol, screener=screener, exchange=exchange, interval=interval)
+
 @dataclass
 class TimeRange:
     """Represents a time range for data queries."""
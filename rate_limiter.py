@@ -3,6 +3,7 @@ Rate limiter implementation using Leaky Bucket algorithm.
 Prevents API rate limit violations with exponential backoff.
 """
 import asyncio
+import threading
 import time
 import logging
 from typing import Optional, Callable, Any, Awaitable
@@ -19,10 +20,6 @@ class RateLimitExceeded(Exception):
 @dataclass
 class RateLimitState:
     """Tracks rate limiting state."""
-    requests_this_minute: int = 0
-    requests_this_hour: int = 0
-    minute_window_start: float = 0
-    hour_window_start: float = 0
     consecutive_failures: int = 0
     current_backoff: float = 0
 
@@ -31,16 +28,26 @@ class RateLimiter:
     Leaky Bucket rate limiter with exponential backoff.
     
     Implements:
-    - Per-minute and per-hour rate limits
+    - Per-minute and per-hour sliding-window rate limits (monotonic clock)
     - Request queue with priority
     - Exponential backoff for 429 errors
     - Request timeout handling
+    - Optional Redis-backed counters shared across worker processes
     """
     
+    # Key prefix for the shared Redis window counters
+    REDIS_KEY_PREFIX = "tv_rate_limit"
+    
     def __init__(self):
         self.state = RateLimitState()
         self.queue: deque = deque()
-        self.lock = asyncio.Lock()
+        # Thread lock: tool calls run their own event loops in worker threads,
+        # and the critical sections below never await
+        self.lock = threading.Lock()
+        
+        # Monotonic times of requests made in the last minute / hour
+        self.minute_requests: deque = deque()
+        self.hour_requests: deque = deque()
         self.enabled = config.enable_rate_limiting
         
         # Rate limit configuration
@@ -50,58 +57,112 @@ class RateLimiter:
         self.max_backoff = config.rate_limit.max_backoff_seconds
         self.backoff_multiplier = config.rate_limit.backoff_multiplier
         
-        logger.info(f"RateLimiter initialized: {self.max_per_minute}/min, {self.max_per_hour}/hour")
+        # Shared backend (Redis), so several workers stay under one global limit
+        self.redis_url: Optional[str] = None
+        # One client per event loop (clients can't be shared across loops)
+        self._redis_clients: dict = {}
+        backend = config.rate_limit.backend
+        if self.enabled and backend.startswith(("redis://", "rediss://", "unix://")):
+            try:
+                import redis.asyncio  # noqa: F401
+                self.redis_url = backend
+            except ImportError:
+                logger.error("TV_RATE_LIMIT_BACKEND is a Redis URL but the redis package is not installed; "
+                             "using in-process rate limits")
+        
+        logger.info(f"RateLimiter initialized: {self.max_per_minute}/min, {self.max_per_hour}/hour, "
+                    f"backend={'redis' if self.redis_url else 'memory'}")
     
-    def _reset_windows_if_needed(self):
-        """Reset rate limit windows if time has elapsed."""
-        current_time = time.time()
-        
-        # Reset minute window
-        if current_time - self.state.minute_window_start >= 60:
-            self.state.requests_this_minute = 0
-            self.state.minute_window_start = current_time
-            logger.debug("Reset minute window")
-        
-        # Reset hour window
-        if current_time - self.state.hour_window_start >= 3600:
-            self.state.requests_this_hour = 0
-            self.state.hour_window_start = current_time
-            logger.debug("Reset hour window")
+    def _prune_windows(self):
+        """Drop requests that have left the sliding windows."""
+        current_time = time.monotonic()
+        
+        while self.minute_requests and current_time - self.minute_requests[0] >= 60:
+            self.minute_requests.popleft()
+        
+        while self.hour_requests and current_time - self.hour_requests[0] >= 3600:
+            self.hour_requests.popleft()
     
     def _can_make_request(self) -> bool:
         """Check if we can make a request without exceeding limits."""
-        self._reset_windows_if_needed()
+        self._prune_windows()
         
-        return (self.state.requests_this_minute < self.max_per_minute and
-                self.state.requests_this_hour < self.max_per_hour)
+        return (len(self.minute_requests) < self.max_per_minute and
+                len(self.hour_requests) < self.max_per_hour)
     
     def _calculate_wait_time(self) -> float:
         """Calculate how long to wait before next request."""
-        self._reset_windows_if_needed()
+        self._prune_windows()
         
         # If we're in backoff, wait for backoff period
         if self.state.current_backoff > 0:
             return self.state.current_backoff
         
-        # If minute limit reached, wait until next minute window
-        if self.state.requests_this_minute >= self.max_per_minute:
-            time_since_window_start = time.time() - self.state.minute_window_start
-            return max(0, 60 - time_since_window_start)
+        wait_time = 0.0
+        current_time = time.monotonic()
         
-        # If hour limit reached, wait until next hour window
-        if self.state.requests_this_hour >= self.max_per_hour:
-            time_since_window_start = time.time() - self.state.hour_window_start
-            return max(0, 3600 - time_since_window_start)
+        # If minute limit reached, wait until the oldest request leaves the window
+        if len(self.minute_requests) >= self.max_per_minute:
+            wait_time = max(wait_time, self.minute_requests[0] + 60 - current_time)
         
-        return 0
+        # If hour limit reached, wait until the oldest request leaves the window
+        if len(self.hour_requests) >= self.max_per_hour:
+            wait_time = max(wait_time, self.hour_requests[0] + 3600 - current_time)
+        
+        return max(0.0, wait_time)
+    
+    def _get_redis(self):
+        """Get the Redis client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            # Drop the clients of loops that have finished (each asyncio.run()
+            # in a worker thread has its own loop). Their connections can't be
+            # closed gracefully without the loop; releasing them lets the
+            # transports close their sockets when collected. A weak-keyed map
+            # wouldn't work: an open connection references its loop.
+            for closed_loop in [l for l in self._redis_clients if l.is_closed()]:
+                del self._redis_clients[closed_loop]
+            
+            client = self._redis_clients.get(loop)
+            if client is None:
+                import redis.asyncio as aioredis
+                client = aioredis.from_url(self.redis_url)
+                self._redis_clients[loop] = client
+        return client
+    
+    async def _reserve_shared(self) -> bool:
+        """
+        Count a request against the shared per-minute and per-hour windows.
+        
+        Returns:
+            True if the request fits within the global limits. Also True if Redis
+            is unreachable, in which case only the in-process limits apply.
+        """
+        now = time.time()
+        minute_key = f"{self.REDIS_KEY_PREFIX}:minute:{int(now // 60)}"
+        hour_key = f"{self.REDIS_KEY_PREFIX}:hour:{int(now // 3600)}"
+        
+        try:
+            async with self._get_redis().pipeline(transaction=True) as pipe:
+                pipe.incr(minute_key)
+                pipe.expire(minute_key, 60)
+                pipe.incr(hour_key)
+                pipe.expire(hour_key, 3600)
+                minute_count, _, hour_count, _ = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Shared rate limit backend unavailable, using in-process limits: {e}")
+            return True
+        
+        return minute_count <= self.max_per_minute and hour_count <= self.max_per_hour
     
     def _record_request(self):
         """Record that a request was made."""
-        self._reset_windows_if_needed()
-        self.state.requests_this_minute += 1
-        self.state.requests_this_hour += 1
-        logger.debug(f"Request recorded: {self.state.requests_this_minute}/min, "
-                    f"{self.state.requests_this_hour}/hour")
+        self._prune_windows()
+        current_time = time.monotonic()
+        self.minute_requests.append(current_time)
+        self.hour_requests.append(current_time)
+        logger.debug(f"Request recorded: {len(self.minute_requests)}/min, "
+                    f"{len(self.hour_requests)}/hour")
     
     def _handle_success(self):
         """Handle successful request - reset backoff."""
@@ -125,6 +186,23 @@ class RateLimiter:
         logger.warning(f"Rate limit hit (failure #{self.state.consecutive_failures}). "
                       f"Backing off for {self.state.current_backoff}s")
     
+    async def wait_for_slot(self):
+        """
+        Wait until a request can be made without exceeding the limits.
+        Lets batch jobs pace themselves instead of triggering the cache fallback.
+        The request itself is recorded by execute().
+        """
+        if not self.enabled:
+            return
+        
+        while True:
+            with self.lock:
+                if self._can_make_request():
+                    return
+                wait_time = self._calculate_wait_time()
+            logger.info(f"Waiting {wait_time:.2f}s for rate limit capacity")
+            await asyncio.sleep(max(wait_time, 0.01))
+    
     async def execute(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
         """
         Execute a function with rate limiting.
@@ -144,7 +222,10 @@ class RateLimiter:
             # Rate limiting disabled, execute immediately
             return await func(*args, **kwargs)
         
-        async with self.lock:
+        # Take a slot in the sliding windows; the lock is never held across an
+        # await, so concurrent callers acquire slots without queueing behind
+        # each other and bursts up to the window capacity run in parallel
+        with self.lock:
             # Check if we're at the rate limit
             if not self._can_make_request():
                 wait_time = self._calculate_wait_time()
@@ -155,6 +236,12 @@ class RateLimiter:
             # Record the request
             self._record_request()
         
+        # Check the global limit shared by all workers (a rejected request
+        # keeps its local slot, which only errs on the cautious side)
+        if self.redis_url and not await self._reserve_shared():
+            logger.warning("Shared rate limit exceeded across workers. Triggering cache fallback.")
+            raise RateLimitExceeded("Shared rate limit exceeded, cache fallback recommended")
+        
         # Execute the function
         max_retries = 5
         for attempt in range(max_retries):
@@ -182,15 +269,17 @@ class RateLimiter:
     
     def get_stats(self) -> dict:
         """Get current rate limiter statistics."""
-        self._reset_windows_if_needed()
-        return {
-            "requests_this_minute": self.state.requests_this_minute,
-            "requests_this_hour": self.state.requests_this_hour,
-            "consecutive_failures": self.state.consecutive_failures,
-            "current_backoff": self.state.current_backoff,
-            "max_per_minute": self.max_per_minute,
-            "max_per_hour": self.max_per_hour
-        }
+        with self.lock:
+            self._prune_windows()
+            return {
+                "requests_this_minute": len(self.minute_requests),
+                "requests_this_hour": len(self.hour_requests),
+                "consecutive_failures": self.state.consecutive_failures,
+                "current_backoff": self.state.current_backoff,
+                "max_per_minute": self.max_per_minute,
+                "max_per_hour": self.max_per_hour,
+                "backend": "redis" if self.redis_url else "memory"
+            }
 
 # Global rate limiter instance
 rate_limiter = RateLimiter()
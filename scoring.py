@@ -0,0 +1,106 @@
+"""
+Vectorized trend scoring for multi-symbol scans.
+Applies the same bullish/bearish signal count as formatter.format_analysis
+to whole arrays of symbols at once.
+
+When numba is installed the per-symbol kernel is JIT-compiled and run in
+parallel over symbols; otherwise the equivalent NumPy expression is used.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+BULLISH_RECOMMENDATIONS = ["BUY", "STRONG_BUY"]
+BEARISH_RECOMMENDATIONS = ["SELL", "STRONG_SELL"]
+
+# Recommendation string -> int code; the sign gives the direction
+RECOMMENDATION_CODES = {
+    "STRONG_SELL": -2,
+    "SELL": -1,
+    "NEUTRAL": 0,
+    "BUY": 1,
+    "STRONG_BUY": 2,
+}
+
+def encode_recommendations(recs) -> np.ndarray:
+    """Map recommendation strings to int8 codes (unknown values count as NEUTRAL)."""
+    return np.fromiter((RECOMMENDATION_CODES.get(rec, 0) for rec in recs), dtype=np.int8)
+
+def _score_batch_numpy(
+    rec_codes: np.ndarray,
+    rsi: np.ndarray,
+    close: np.ndarray,
+    psar: np.ndarray,
+    ao: np.ndarray
+) -> np.ndarray:
+    """Net scores for encoded inputs using NumPy array expressions."""
+    bull = 2 * (rec_codes > 0).astype(np.int16) + (rsi < 30) + (close > psar) + (ao > 0)
+    bear = 2 * (rec_codes < 0).astype(np.int16) + (rsi > 70) + (close <= psar) + (ao < 0)
+    return (bull - bear).astype(np.int16)
+
+if njit is not None:
+    # No fastmath: NaN (missing indicator) must compare False to contribute no signal
+    @njit(parallel=True, cache=True)
+    def _score_batch_numba(rec_codes, rsi, close, psar, ao):
+        """Net scores for encoded inputs, compiled and parallel over symbols."""
+        n = rec_codes.shape[0]
+        scores = np.zeros(n, dtype=np.int16)
+        for i in prange(n):
+            score = 0
+            if rec_codes[i] > 0:
+                score += 2
+            elif rec_codes[i] < 0:
+                score -= 2
+            if rsi[i] < 30:
+                score += 1
+            elif rsi[i] > 70:
+                score -= 1
+            if close[i] > psar[i]:
+                score += 1
+            elif close[i] <= psar[i]:
+                score -= 1
+            if ao[i] > 0:
+                score += 1
+            elif ao[i] < 0:
+                score -= 1
+            scores[i] = score
+        return scores
+
+    score_batch = _score_batch_numba
+else:
+    score_batch = _score_batch_numpy
+
+def score_signals(
+    recs: np.ndarray,
+    rsi: np.ndarray,
+    close: np.ndarray,
+    psar: np.ndarray,
+    ao: np.ndarray
+) -> np.ndarray:
+    """
+    Compute the net trend score (bullish minus bearish signals) per symbol.
+
+    Signals match the single-symbol report:
+    - Summary recommendation BUY/STRONG_BUY (+2) or SELL/STRONG_SELL (-2)
+    - RSI below 30 (+1) or above 70 (-1)
+    - Close above Parabolic SAR (+1) or at/below it (-1)
+    - Awesome Oscillator above 0 (+1) or below 0 (-1)
+
+    Args:
+        recs: Summary recommendation strings
+        rsi, close, psar, ao: Indicator values; missing values should be NaN
+            and contribute no signal
+
+    Returns:
+        int16 array of net scores (positive = bullish, negative = bearish)
+    """
+    return score_batch(
+        encode_recommendations(recs),
+        np.asarray(rsi, dtype=np.float64),
+        np.asarray(close, dtype=np.float64),
+        np.asarray(psar, dtype=np.float64),
+        np.asarray(ao, dtype=np.float64),
+    )
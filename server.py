@@ -1,13 +1,28 @@
 import asyncio
+import concurrent.futures
+import io
 import logging
+import sys
+import threading
+import time
+import anyio
+from typing import Awaitable, Callable, Optional
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent, ImageContent, EmbeddedResource
-from tradingview_ta import TA_Handler, Interval, Exchange
+from tradingview_ta import Interval, Exchange, get_multiple_analysis
+import tv_session  # noqa: F401 - shares one keep-alive session across TradingView calls
 
 # Import caching system
-from data_fetcher import data_fetcher
+from config import config
+from data_fetcher import data_fetcher, STRING_TV_INTERVAL_MAP
+from disk_cache import disk_cache
+from memory_cache import MemoryCache
+from metrics import DEDUP_COALESCED
 from rate_limiter import rate_limiter
+from formatter import format_analysis_sections, format_cached_analysis, format_trend_scores
+from tools_schema import TOOL_SPECS
+from scoring import score_signals
 
 # Configure logging
 logging.basicConfig(
@@ -19,303 +34,320 @@ logger = logging.getLogger(__name__)
 # Initialize Server
 app = Server("tradingview-analyzer")
 
+# Tool schemas are immutable, so build them once instead of per list_tools call
+_TOOLS: list[Tool] = [Tool(**spec) for spec in TOOL_SPECS]
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
-    return [
-        Tool(
-            name="get_crypto_analysis",
-            description="Get technical analysis for a crypto pair",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {"type": "string", "description": "The crypto symbol (e.g., 'BTCUSDT')"},
-                    "exchange": {"type": "string", "default": "BINANCE", "description": "The exchange"},
-                    "interval": {"type": "string", "default": "1d", "description": "The interval (1m, 5m, 15m, 1h, 4h, 1d, 1W, 1M)"}
-                },
-                "required": ["symbol"]
-            }
-        ),
-        Tool(
-            name="get_stock_analysis",
-            description="Get technical analysis for a stock",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {"type": "string", "description": "The stock symbol (e.g., 'TSLA')"},
-                    "exchange": {"type": "string", "default": "NASDAQ", "description": "The exchange"},
-                    "interval": {"type": "string", "default": "1d", "description": "The interval (1m, 5m, 15m, 1h, 4h, 1d, 1W, 1M)"}
-                },
-                "required": ["symbol"]
-            }
-        ),
-        Tool(
-            name="get_forex_analysis",
-            description="Get technical analysis for a forex pair",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "symbol": {"type": "string", "description": "The forex symbol (e.g., 'EURUSD')"},
-                    "exchange": {"type": "string", "default": "FX_IDC", "description": "The exchange"},
-                    "interval": {"type": "string", "default": "1d", "description": "The interval (1m, 5m, 15m, 1h, 4h, 1d, 1W, 1M)"}
-                },
-                "required": ["symbol"]
-            }
-        )
-    ]
+    return _TOOLS
+
+# Tool name -> (screener, default exchange)
+_TOOL_DISPATCH = {
+    "get_crypto_analysis": ("crypto", "BINANCE"),
+    "get_stock_analysis": ("america", "NASDAQ"),
+    "get_forex_analysis": ("forex", "FX_IDC"),
+}
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent | ImageContent | EmbeddedResource]:
-    if name == "get_crypto_analysis":
-        result = await get_analysis(arguments["symbol"], "crypto", arguments.get("exchange", "BINANCE"), arguments.get("interval", "1d"))
-        return [TextContent(type="text", text=result)]
-    elif name == "get_stock_analysis":
-        result = await get_analysis(arguments["symbol"], "america", arguments.get("exchange", "NASDAQ"), arguments.get("interval", "1d"))
-        return [TextContent(type="text", text=result)]
-    elif name == "get_forex_analysis":
-        result = await get_analysis(arguments["symbol"], "forex", arguments.get("exchange", "FX_IDC"), arguments.get("interval", "1d"))
-        return [TextContent(type="text", text=result)]
-    else:
+    if name == "get_trend_scores":
+        scores = await get_trend_scores(
+            arguments["symbols"],
+            arguments.get("screener", "crypto"),
+            arguments.get("exchange", "BINANCE"),
+            arguments.get("interval", "1d")
+        )
+        return [TextContent(type="text", text=format_trend_scores(scores))]
+    
+    if name not in _TOOL_DISPATCH:
         raise ValueError(f"Unknown tool: {name}")
+    
+    screener, default_exchange = _TOOL_DISPATCH[name]
+    sections = await get_analysis_sections(
+        arguments["symbol"],
+        screener,
+        arguments.get("exchange", default_exchange),
+        arguments.get("interval", "1d"),
+        on_progress=_progress_reporter()
+    )
+    # One TextContent per report section so clients can render each as it is parsed
+    return [TextContent(type="text", text=section) for section in sections]
+
+# Progress steps reported per analysis: data fetched, indicators fetched
+ANALYSIS_STEPS = 2
+
+def _progress_reporter() -> Optional[Callable[[float], Awaitable[None]]]:
+    """
+    Build a callback that sends MCP progress notifications for the current request.
+    Returns None when there is no request context or the client sent no progress token.
+    """
+    try:
+        ctx = app.request_context
+    except LookupError:
+        return None
+    
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+    
+    async def report(progress: float):
+        try:
+            await ctx.session.send_progress_notification(token, progress, ANALYSIS_STEPS)
+        except Exception as e:
+            logger.error(f"Error sending progress notification: {e}")
+    
+    return report
 
-async def get_analysis_data(symbol: str, screener: str, exchange: str, interval: str) -> dict:
+async def get_analysis_data(
+    symbol: str,
+    screener: str,
+    exchange: str,
+    interval: str,
+    force_refresh: bool = False
+) -> dict:
     """
     Get raw analysis data as a dictionary for programmatic use.
     Returns key indicators including OHLC, Parabolic SAR, etc.
-    Now uses caching to reduce API calls.
+    Now uses caching to reduce API calls; pass force_refresh=True to bypass it.
     """
     try:
         # Use the cached data fetcher
-        result = await data_fetcher.get_analysis_with_cache(symbol, screener, exchange, interval)
+        result = await data_fetcher.get_analysis_with_cache(symbol, screener, exchange, interval, force_refresh)
         return result
     except Exception as e:
         logger.error(f"Error in get_analysis_data: {e}")
         return {}
 
+# In-flight get_analysis calls keyed by (symbol, screener, exchange, interval).
+# Thread-safe futures, so callers on other event loops (agent tools run
+# asyncio.run in each Streamlit session's thread) can share a fetch too
+_INFLIGHT: dict[tuple, concurrent.futures.Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Formatted full reports keyed by (symbol, screener, exchange, interval),
+# kept for the interval's live data TTL; also written to the disk cache so a
+# restarted process starts warm
+_REPORT_CACHE = MemoryCache(maxsize=config.cache.memory_cache_max_entries, name="reports")
+
+def _report_disk_key(key: tuple) -> str:
+    """Disk cache key for a formatted report."""
+    symbol, screener, exchange, interval = key
+    return f"report:{screener}:{exchange}:{symbol}:{interval}"
+
+async def _load_report(key: tuple) -> Optional[tuple]:
+    """Get a cached report from memory, then from disk (restoring it to memory)."""
+    cached = _REPORT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    stored = await disk_cache.get(_report_disk_key(key))
+    if stored is None:
+        return None
+    
+    expires_at, sections = stored
+    remaining = expires_at - time.time()
+    if remaining <= 0:
+        return None
+    _REPORT_CACHE.put(key, sections, remaining)
+    return sections
+
+async def _store_report(key: tuple, sections: tuple):
+    """Cache a report in memory and on disk for its interval's live data TTL."""
+    ttl = config.cache.live_ttl_for(key[3])
+    _REPORT_CACHE.put(key, sections, ttl)
+    await disk_cache.put(_report_disk_key(key), (time.time() + ttl, sections), ttl)
+
+def cache_stats() -> dict:
+    """Get hit/miss statistics for the formatted report and indicator caches."""
+    return {
+        "reports": _REPORT_CACHE.get_stats(),
+        "analyses": data_fetcher.analysis_cache.get_stats(),
+    }
+
 async def get_analysis(symbol: str, screener: str, exchange: str, interval: str) -> str:
     """
     Get formatted analysis string with caching and rate limiting.
     """
+    return "".join(await get_analysis_sections(symbol, screener, exchange, interval))
+
+async def get_timeframe_reports(symbol: str, screener: str, exchange: str, timeframes: list[str]) -> dict[str, str]:
+    """
+    Get formatted analyses of one symbol for several timeframes.
+    All timeframes are loaded with one batched request and formatted
+    concurrently. Timeframes the batch didn't load are fetched one at a time,
+    each waiting for rate limit capacity (RateLimiter.execute raises instead
+    of waiting, so a concurrent burst past the limit would return errors).
+    
+    Returns:
+        Dictionary of {timeframe: report text}, in the order given; failures
+        become "Error: ..." text
+    """
+    async def report(tf: str) -> str:
+        try:
+            return await get_analysis(symbol, screener, exchange, tf)
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    await data_fetcher.prefetch_analyses(symbol, screener, exchange, timeframes)
+    loaded = [
+        tf for tf in timeframes
+        if data_fetcher.analysis_cache.get((symbol, screener, exchange, tf)) is not None
+    ]
+    reports = dict(zip(loaded, await asyncio.gather(*[report(tf) for tf in loaded])))
+    
+    for tf in timeframes:
+        if tf not in reports:
+            await rate_limiter.wait_for_slot()
+            reports[tf] = await report(tf)
+    
+    return {tf: reports[tf] for tf in timeframes}
+
+async def get_analysis_sections(
+    symbol: str,
+    screener: str,
+    exchange: str,
+    interval: str,
+    on_progress: Optional[Callable[[float], Awaitable[None]]] = None
+) -> list[str]:
+    """
+    Get the formatted analysis as a list of report sections.
+    Concurrent calls for the same key share a single in-flight fetch, across
+    threads and event loops; on_progress is only called by the caller that
+    performs the fetch.
+    """
+    key = (symbol, screener, exchange, interval)
+    if config.enable_cache:
+        cached = await _load_report(key)
+        if cached is not None:
+            logger.debug(f"Report cache hit for {symbol} {interval}")
+            return list(cached)
+    
+    with _INFLIGHT_LOCK:
+        inflight = _INFLIGHT.get(key)
+        if inflight is None:
+            future = concurrent.futures.Future()
+            _INFLIGHT[key] = future
+    
+    if inflight is not None:
+        logger.debug(f"Joining in-flight analysis for {symbol} {interval}")
+        DEDUP_COALESCED.inc()
+        # Shield so a cancelled joiner doesn't cancel the shared fetch
+        return await asyncio.shield(asyncio.wrap_future(inflight))
+    
+    try:
+        result = await _get_analysis_uncoalesced(symbol, screener, exchange, interval, on_progress)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        # Joiners get the same error as the leader
+        future.set_exception(e)
+        raise
+    except BaseException:
+        # Cancelled (or interrupted) leader: joiners are cancelled too
+        future.cancel()
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
+async def _get_analysis_uncoalesced(
+    symbol: str,
+    screener: str,
+    exchange: str,
+    interval: str,
+    on_progress: Optional[Callable[[float], Awaitable[None]]] = None
+) -> list[str]:
+    """Fetch and format a single analysis as report sections (no request coalescing)."""
     try:
         # Get data with cache fallback support
         data = await get_analysis_data(symbol, screener, exchange, interval)
+        if on_progress:
+            await on_progress(1)
         
         # Check if this is cached data due to rate limiting
         cache_warning = data.get('cache_warning')
         from_cache = data.get('from_cache', False)
         
         # Display cache warning prominently if present
-        output = ""
+        sections = []
         if cache_warning:
-            output += f"\n{'='*60}\n"
-            output += f"{cache_warning}\n"
-            output += f"{'='*60}\n\n"
+            sections.append(f"\n{'='*60}\n{cache_warning}\n{'='*60}\n\n")
         elif from_cache and 'error' in data:
             # No cached data available
-            return f"Error: {data.get('error', 'Unknown error occurred')}\n"
+            return [f"Error: {data.get('error', 'Unknown error occurred')}\n"]
         
         # If we have an error and no cached data, return the error
         if 'error' in data and not (data.get('open') or data.get('close')):
-            return f"Error: {data['error']}\n"
-        
-        # Map interval string to tradingview_ta Interval constant
-        interval_map = {
-            "1m": Interval.INTERVAL_1_MINUTE,
-            "5m": Interval.INTERVAL_5_MINUTES,
-            "15m": Interval.INTERVAL_15_MINUTES,
-            "30m": Interval.INTERVAL_30_MINUTES,
-            "1h": Interval.INTERVAL_1_HOUR,
-            "4h": Interval.INTERVAL_4_HOURS,
-            "1d": Interval.INTERVAL_1_DAY,
-            "1W": Interval.INTERVAL_1_WEEK,
-            "1M": Interval.INTERVAL_1_MONTH,
-        }
+            return [f"Error: {data['error']}\n"]
         
-        tv_interval = interval_map.get(interval, Interval.INTERVAL_1_DAY)
-
         # For cached data, we only have basic OHLC, so create simplified output
         if from_cache:
-            output += f"Analysis for {symbol} on {exchange} ({interval}) [FROM CACHE]:\n\n"
-            output += "Basic Price Data:\n"
-            output += f"Open: {data.get('open', 0):.2f}, "
-            output += f"Close: {data.get('close', 0):.2f}, "
-            output += f"High: {data.get('high', 0):.2f}, "
-            output += f"Low: {data.get('low', 0):.2f}\n"
-            
-            # Add candle direction analysis
-            open_price = data.get('open', 0)
-            close_price = data.get('close', 0)
-            high_price = data.get('high', 0)
-            low_price = data.get('low', 0)
-            
-            output += "\nCandle Analysis:\n"
-            if close_price > open_price:
-                candle_body = close_price - open_price
-                output += f"🟢 Bullish Candle (Close > Open)\n"
-            elif close_price < open_price:
-                candle_body = open_price - close_price
-                output += f"🔴 Bearish Candle (Close < Open)\n"
-            else:
-                candle_body = 0
-                output += f"⚪ Doji Candle (Close = Open)\n"
-            
-            if candle_body > 0:
-                candle_range = high_price - low_price
-                body_percentage = (candle_body / candle_range * 100) if candle_range > 0 else 0
-                output += f"Body size: {candle_body:.2f} ({body_percentage:.1f}% of range)\n"
-            
-            output += "\n⚠️ Full technical indicators unavailable due to rate limiting.\n"
-            output += "Please wait a moment and try again for complete analysis.\n"
-            
+            sections.append(format_cached_analysis(data, symbol, exchange, interval))
             logger.info(f"Returned cached analysis for {symbol} {interval}")
-            return output
+            return sections
 
-        # Fetch full analysis with indicators
-        async def fetch_analysis():
-            handler = TA_Handler(
-                symbol=symbol,
-                screener=screener,
-                exchange=exchange,
-                interval=tv_interval
-            )
-            return handler.get_analysis()
-        
-        analysis = await rate_limiter.execute(fetch_analysis)
-        
-        # Get candle data
-        open_price = analysis.indicators.get('open', 0)
-        close_price = analysis.indicators.get('close', 0)
-        high_price = analysis.indicators.get('high', 0)
-        low_price = analysis.indicators.get('low', 0)
-        
-        # Format the output
-        output += f"Analysis for {symbol} on {exchange} ({interval}):\n"
-        output += f"Recommendation: {analysis.summary['RECOMMENDATION']}\n"
-        output += f"Buy: {analysis.summary['BUY']}, Sell: {analysis.summary['SELL']}, Neutral: {analysis.summary['NEUTRAL']}\n\n"
-        
-        # Add candle direction
-        output += "Candle Analysis:\n"
-        if close_price > open_price:
-            candle_body = close_price - open_price
-            output += f"🟢 Bullish Candle (Close > Open)\n"
-        elif close_price < open_price:
-            candle_body = open_price - close_price
-            output += f"🔴 Bearish Candle (Close < Open)\n"
-        else:
-            candle_body = 0
-            output += f"⚪ Doji Candle (Close = Open)\n"
-        
-        output += f"Open: {open_price:.2f}, Close: {close_price:.2f}, High: {high_price:.2f}, Low: {low_price:.2f}\n"
-        if candle_body > 0:
-            candle_range = high_price - low_price
-            body_percentage = (candle_body / candle_range * 100) if candle_range > 0 else 0
-            output += f"Body size: {candle_body:.2f} ({body_percentage:.1f}% of range)\n"
-        output += "\n"
+        # Full analysis with indicators (usually the response get_analysis_data just fetched)
+        analysis = await data_fetcher.fetch_analysis(symbol, screener, exchange, interval)
+        if on_progress:
+            await on_progress(2)
         
-        output += "Oscillators:\n"
-        output += f"Recommendation: {analysis.oscillators['RECOMMENDATION']}\n"
-        if 'RSI' in analysis.indicators:
-            rsi = analysis.indicators['RSI']
-            output += f"RSI: {rsi:.2f}"
-            if rsi > 70:
-                output += " (Overbought - Bearish)\n"
-            elif rsi < 30:
-                output += " (Oversold - Bullish)\n"
-            else:
-                output += " (Neutral)\n"
-        if 'MACD.macd' in analysis.indicators:
-            output += f"MACD: {analysis.indicators['MACD.macd']:.2f}\n"
-            
-        output += "\nMoving Averages:\n"
-        output += f"Recommendation: {analysis.moving_averages['RECOMMENDATION']}\n"
-        if 'EMA20' in analysis.indicators:
-            output += f"EMA20: {analysis.indicators['EMA20']:.2f}\n"
-        if 'SMA50' in analysis.indicators:
-            output += f"SMA50: {analysis.indicators['SMA50']:.2f}\n"
-        if 'SMA200' in analysis.indicators:
-            output += f"SMA200: {analysis.indicators['SMA200']:.2f}\n"
+        sections.extend(format_analysis_sections(analysis, symbol, exchange, interval))
+        if config.enable_cache and not cache_warning:
+            await _store_report((symbol, screener, exchange, interval), tuple(sections))
         
-        # Add Parabolic SAR
-        output += "\nTrend Indicators:\n"
-        if 'P.SAR' in analysis.indicators:
-            psar = analysis.indicators['P.SAR']
-            close = analysis.indicators.get('close', 0)
-            output += f"Parabolic SAR: {psar:.2f}"
-            if close > psar:
-                output += " (Price above SAR - Bullish trend)\n"
-            else:
-                output += " (Price below SAR - Bearish trend)\n"
-        
-        # Add ADX (Average Directional Index)
-        if 'ADX' in analysis.indicators:
-            adx = analysis.indicators['ADX']
-            output += f"ADX: {adx:.2f}"
-            if adx > 25:
-                output += " (Strong trend)\n"
-            elif adx > 20:
-                output += " (Developing trend)\n"
-            else:
-                output += " (Weak/No trend)\n"
-        
-        # Add Awesome Oscillator (instead of Force Index)
-        if 'AO' in analysis.indicators:
-            ao = analysis.indicators['AO']
-            ao_prev = analysis.indicators.get('AO[1]', 0)
-            output += f"Awesome Oscillator: {ao:.2f}"
-            if ao > 0 and ao > ao_prev:
-                output += " (Bullish momentum increasing)\n"
-            elif ao > 0:
-                output += " (Bullish momentum)\n"
-            elif ao < 0 and ao < ao_prev:
-                output += " (Bearish momentum increasing)\n"
-            else:
-                output += " (Bearish momentum)\n"
-        
-        # Overall trend direction
-        output += "\n📊 TREND DIRECTION:\n"
-        bullish_signals = 0
-        bearish_signals = 0
-        
-        # Count signals
-        if analysis.summary['RECOMMENDATION'] in ['BUY', 'STRONG_BUY']:
-            bullish_signals += 2
-        elif analysis.summary['RECOMMENDATION'] in ['SELL', 'STRONG_SELL']:
-            bearish_signals += 2
+        logger.info(f"Analysis completed for {symbol} {interval}")
+        return sections
+
+    except Exception as e:
+        error_msg = f"Error fetching analysis for {symbol}: {str(e)}"
+        logger.error(error_msg)
+        return [error_msg]
+
+async def get_trend_scores(symbols: list[str], screener: str, exchange: str, interval: str) -> dict:
+    """
+    Score many symbols at once for portfolio scans.
+    Fetches all symbols in one batched TradingView request and scores them
+    with the vectorized signal count from scoring.score_signals.
+    
+    Returns:
+        Dictionary of {symbol: score} (bullish minus bearish signals).
+        Symbols TradingView returns no data for are omitted.
+    """
+    try:
+        tv_interval = STRING_TV_INTERVAL_MAP.get(interval, Interval.INTERVAL_1_DAY)
+        tickers = [f"{exchange}:{symbol}".upper() for symbol in symbols]
         
-        if 'RSI' in analysis.indicators:
-            if analysis.indicators['RSI'] < 30:
-                bullish_signals += 1
-            elif analysis.indicators['RSI'] > 70:
-                bearish_signals += 1
+        async def fetch_analyses():
+            return await asyncio.to_thread(
+                get_multiple_analysis, screener=screener, interval=tv_interval, symbols=tickers
+            )
         
-        if 'P.SAR' in analysis.indicators and 'close' in analysis.indicators:
-            if analysis.indicators['close'] > analysis.indicators['P.SAR']:
-                bullish_signals += 1
-            else:
-                bearish_signals += 1
+        analyses = await rate_limiter.execute(fetch_analyses)
+        found = [(symbol, analyses[ticker]) for symbol, ticker in zip(symbols, tickers) if analyses.get(ticker)]
+        if not found:
+            return {}
         
-        if 'AO' in analysis.indicators:
-            if analysis.indicators['AO'] > 0:
-                bullish_signals += 1
-            elif analysis.indicators['AO'] < 0:
-                bearish_signals += 1
+        scores = score_signals(
+            recs=[a.summary['RECOMMENDATION'] for _, a in found],
+            rsi=[a.indicators.get('RSI') for _, a in found],
+            close=[a.indicators.get('close') for _, a in found],
+            psar=[a.indicators.get('P.SAR') for _, a in found],
+            ao=[a.indicators.get('AO') for _, a in found],
+        )
         
-        if bullish_signals > bearish_signals:
-            output += f"🟢 BULLISH ({bullish_signals} bullish vs {bearish_signals} bearish signals)\n"
-        elif bearish_signals > bullish_signals:
-            output += f"🔴 BEARISH ({bearish_signals} bearish vs {bullish_signals} bullish signals)\n"
-        else:
-            output += f"⚪ NEUTRAL ({bullish_signals} bullish vs {bearish_signals} bullish signals)\n"
+        logger.info(f"Scored {len(found)}/{len(symbols)} symbols on {exchange} ({interval})")
+        return {symbol: int(score) for (symbol, _), score in zip(found, scores)}
         
-        logger.info(f"Analysis completed for {symbol} {interval}")
-        return output
-
     except Exception as e:
-        error_msg = f"Error fetching analysis for {symbol}: {str(e)}"
-        logger.error(error_msg)
-        return error_msg
+        logger.error(f"Error in get_trend_scores: {e}")
+        return {}
 
 async def main():
-    async with stdio_server() as (read_stream, write_stream):
+    # Pin stdio to UTF-8 so emoji in reports aren't mangled by a non-UTF-8 locale
+    stdin = anyio.wrap_file(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8"))
+    stdout = anyio.wrap_file(io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8"))
+    
+    async with stdio_server(stdin, stdout) as (read_stream, write_stream):
         await app.run(
             read_stream,
             write_stream,
@@ -0,0 +1,99 @@
+"""
+Smoke tests for the agent's tool functions, run together as one suite.
+All calls are started at once in worker threads (each tool runs its own
+event loop), so the suite takes about as long as the slowest call.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from agent import get_multi_timeframe_analysis, get_parabolic_sar_signal, call_tool, ALLOWED_SYMBOLS, TOOL_FUNCTIONS
+from rate_limiter import RateLimiter
+
+# name -> (tool function, arguments)
+AGENT_CALLS = {
+    "multi_timeframe_btcusdt": (get_multi_timeframe_analysis, ("BTCUSDT", "crypto", "BINANCE")),
+    "sar_btcusdt": (get_parabolic_sar_signal, ("BTCUSDT", "crypto", "BINANCE")),
+    "sar_usdjpy": (get_parabolic_sar_signal, ("USDJPY", "forex", "FX_IDC")),
+    "sar_eurusd": (get_parabolic_sar_signal, ("EURUSD", "forex", "FX_IDC")),
+}
+
+async def run_agent_calls() -> dict:
+    """Run every agent call concurrently and return {name: result or exception}."""
+    results = await asyncio.gather(
+        *[asyncio.to_thread(func, *args) for func, args in AGENT_CALLS.values()],
+        return_exceptions=True
+    )
+    return dict(zip(AGENT_CALLS, results))
+
+@pytest.fixture(scope="module")
+def agent_results() -> dict:
+    """Results of all agent calls, fetched once for the whole module."""
+    return asyncio.run(run_agent_calls())
+
+def test_multi_timeframe(agent_results):
+    """Test the multi-timeframe report for BTCUSDT."""
+    result = agent_results["multi_timeframe_btcusdt"]
+    print(result[:500])
+    assert isinstance(result, str)
+    assert "Multi-Timeframe Analysis for BTCUSDT" in result
+
+@pytest.mark.parametrize("name, symbol", [
+    ("sar_btcusdt", "BTCUSDT"),
+    ("sar_usdjpy", "USDJPY"),
+])
+def test_sar_signal(agent_results, name, symbol):
+    """Test the Parabolic SAR signal report (crypto and forex)."""
+    result = agent_results[name]
+    print(result)
+    assert isinstance(result, str)
+    assert f"Parabolic SAR Multi-Timeframe Analysis for {symbol}" in result
+
+def test_sar_signal_unsupported_symbol(agent_results):
+    """Test that symbols outside the supported list are rejected without analysis."""
+    result = agent_results["sar_eurusd"]
+    print(result)
+    assert "UNSUPPORTED SYMBOL: EURUSD" in result
+
+def test_call_tool_rejects_symbol_outside_allow_list():
+    """Test that the allow-list answers unsupported symbols without running the tool."""
+    result = call_tool("get_crypto_analysis", {"symbol": "ETHUSDT"}, ALLOWED_SYMBOLS)
+    assert result.startswith("UNSUPPORTED SYMBOL: ETHUSDT")
+
+def test_call_tool_from_several_threads(monkeypatch):
+    """Test that tools run concurrently in threads (each with its own event loop) share one rate limiter."""
+    class SlowRecordLimiter(RateLimiter):
+        """Holds the lock a little longer so threads contend for it."""
+        def _record_request(self):
+            time.sleep(0.001)
+            super()._record_request()
+    
+    limiter = SlowRecordLimiter()
+    limiter.enabled = True
+    limiter.max_per_minute = limiter.max_per_hour = 10_000
+    
+    async def mock_api_call():
+        await asyncio.sleep(0.001)
+        return "ok"
+    
+    def rate_limited_tool(symbol: str):
+        """Stand-in tool that, like the real ones, runs asyncio.run in its thread."""
+        return asyncio.run(limiter.execute(mock_api_call))
+    
+    monkeypatch.setitem(TOOL_FUNCTIONS, "rate_limited_tool", rate_limited_tool)
+    executor = ThreadPoolExecutor(max_workers=8)
+    try:
+        futures = [executor.submit(call_tool, "rate_limited_tool", {"symbol": "BTCUSDT"}) for _ in range(200)]
+        results = [future.result(timeout=30) for future in futures]
+    finally:
+        # Don't wait on a deadlocked worker; the timeout above already failed the test
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    assert results == ["ok"] * 200
+    assert limiter.get_stats()["requests_this_minute"] == 200
+
+if __name__ == "__main__":
+    for name, result in asyncio.run(run_agent_calls()).items():
+        print(f"=== {name} ===")
+        print(result)
+        print()
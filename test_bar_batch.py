@@ -0,0 +1,29 @@
+"""
+Test the columnar BarBatch model without any GCP calls.
+"""
+from models import Bar, BarBatch
+
+def test_round_trip():
+    """Test conversion to and from bars and the packed binary format."""
+    bars = [Bar(timestamp=1700000000 + i * 60, open=100.0 + i, high=101.0 + i,
+                low=99.0 + i, close=100.5 + i, volume=10.0) for i in range(5)]
+    batch = BarBatch.from_bars(bars)
+
+    assert len(batch) == 5
+    assert batch.to_bars() == bars
+    assert len(batch.to_bytes()) == 5 * BarBatch.BYTES_PER_BAR
+    assert BarBatch.from_bytes(batch.to_bytes()).to_bars() == bars
+
+def test_sorted_unique_keeps_latest():
+    """Test that merging keeps the last bar written for a timestamp."""
+    old = BarBatch([2, 1], 1.0, 1.0, 1.0, 1.0, 1.0)
+    new = BarBatch([2, 3], 2.0, 2.0, 2.0, 2.0, 2.0)
+    merged = BarBatch.concat([old, new]).sorted_unique()
+
+    assert merged.timestamps.tolist() == [1, 2, 3]
+    assert merged.closes.tolist() == [1.0, 2.0, 2.0]
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_sorted_unique_keeps_latest()
+    print("✓ ALL BAR BATCH TESTS PASSED")
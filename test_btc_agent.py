@@ -1,3 +1,4 @@
+import asyncio
 import vertexai
 from vertexai.generative_models import GenerativeModel, Tool, FunctionDeclaration
 from server import get_analysis
@@ -6,15 +7,15 @@ import sys
 # Define Tool Functions
 def get_crypto_analysis(symbol: str, exchange: str = "BINANCE", interval: str = "1d"):
     """Get technical analysis for a crypto pair."""
-    return get_analysis(symbol, "crypto", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "crypto", exchange, interval))
 
 def get_stock_analysis(symbol: str, exchange: str = "NASDAQ", interval: str = "1d"):
     """Get technical analysis for a stock."""
-    return get_analysis(symbol, "america", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "america", exchange, interval))
 
 def get_forex_analysis(symbol: str, exchange: str = "FX_IDC", interval: str = "1d"):
     """Get technical analysis for a forex pair."""
-    return get_analysis(symbol, "forex", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "forex", exchange, interval))
 
 def run_test():
     # Initialize Vertex AI
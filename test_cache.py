@@ -3,37 +3,34 @@ Test cache functionality including gap detection and data integrity.
 """
 import asyncio
 import time
-from datetime import datetime, timedelta
-from models import Bar, CacheKey, TimeRange, Interval
-from cache_manager import cache_manager
+from datetime import datetime
+import numpy as np
+from models import BarBatch, TimeRange, Interval, make_key
+from cache_manager import cache_manager, HotKeyTracker
+
+def make_bars(timestamps, open, high, low, close, volume) -> BarBatch:
+    """Build a columnar batch of bars (scalars are broadcast), sorted oldest to newest."""
+    batch = BarBatch(timestamps, open, high, low, close, volume)
+    return batch.select(np.argsort(batch.timestamps))
 
 async def test_cache_basic():
     """Test basic cache operations."""
     print("\n=== Testing Basic Cache Operations ===")
     
     # Create test data
-    cache_key = CacheKey(
-        symbol="BTCUSDT",
-        screener="crypto",
-        exchange="BINANCE",
-        interval=Interval.ONE_MINUTE
-    )
+    cache_key = make_key("BTCUSDT", "crypto", "BINANCE", Interval.ONE_MINUTE)
     
-    # Generate test bars
+    # Generate test bars at 1 minute intervals
     now = int(datetime.now().timestamp())
-    bars = []
-    for i in range(10):
-        timestamp = now - (i * 60)  # 1 minute intervals
-        bars.append(Bar(
-            timestamp=timestamp,
-            open=50000.0 + i,
-            high=50100.0 + i,
-            low=49900.0 + i,
-            close=50050.0 + i,
-            volume=1000.0
-        ))
-    
-    bars.reverse()  # Sort oldest to newest
+    i = np.arange(10)
+    bars = make_bars(
+        timestamps=now - i * 60,
+        open=50000.0 + i,
+        high=50100.0 + i,
+        low=49900.0 + i,
+        close=50050.0 + i,
+        volume=1000.0
+    )
     
     # Test cache put
     print(f"Storing {len(bars)} bars...")
@@ -42,8 +39,8 @@ async def test_cache_basic():
     
     # Test cache get
     time_range = TimeRange(
-        start_timestamp=bars[0].timestamp,
-        end_timestamp=bars[-1].timestamp
+        start_timestamp=int(bars.timestamps[0]),
+        end_timestamp=int(bars.timestamps[-1])
     )
     
     print(f"Retrieving bars from cache...")
@@ -62,44 +59,20 @@ async def test_gap_detection():
     """Test gap detection in cached data."""
     print("\n=== Testing Gap Detection ===")
     
-    cache_key = CacheKey(
-        symbol="ETHUSDT",
-        screener="crypto",
-        exchange="BINANCE",
-        interval=Interval.FIVE_MINUTES
-    )
+    cache_key = make_key("ETHUSDT", "crypto", "BINANCE", Interval.FIVE_MINUTES)
     
-    # Create bars with a gap in the middle
+    # Create bars with a gap in the middle: two segments of 5 bars at
+    # 5 minute intervals, separated by 1 hour
     now = int(datetime.now().timestamp())
-    bars = []
-    
-    # First segment: 5 bars
-    for i in range(5):
-        timestamp = now - (i * 300)  # 5 minute intervals
-        bars.append(Bar(
-            timestamp=timestamp,
-            open=3000.0,
-            high=3100.0,
-            low=2900.0,
-            close=3050.0,
-            volume=500.0
-        ))
-    
-    # Gap of 1 hour
-    
-    # Second segment: 5 bars
-    for i in range(5):
-        timestamp = now - (3600 + i * 300)  # 1 hour gap + 5 minute intervals
-        bars.append(Bar(
-            timestamp=timestamp,
-            open=3000.0,
-            high=3100.0,
-            low=2900.0,
-            close=3050.0,
-            volume=500.0
-        ))
-    
-    bars.reverse()
+    offsets = np.concatenate([np.arange(5) * 300, 3600 + np.arange(5) * 300])
+    bars = make_bars(
+        timestamps=now - offsets,
+        open=3000.0,
+        high=3100.0,
+        low=2900.0,
+        close=3050.0,
+        volume=500.0
+    )
     
     # Store bars
     print(f"Storing {len(bars)} bars with gap...")
@@ -107,8 +80,8 @@ async def test_gap_detection():
     
     # Request range that spans the gap
     time_range = TimeRange(
-        start_timestamp=bars[0].timestamp - 600,  # Request before first bar
-        end_timestamp=bars[-1].timestamp + 600  # Request after last bar
+        start_timestamp=int(bars.timestamps[0]) - 600,  # Request before first bar
+        end_timestamp=int(bars.timestamps[-1]) + 600  # Request after last bar
     )
     
     print(f"Finding gaps in requested range...")
@@ -124,42 +97,21 @@ async def test_tier_partitioning():
     """Test automatic partitioning between hot and cold tiers."""
     print("\n=== Testing Tier Partitioning ===")
     
-    cache_key = CacheKey(
-        symbol="AAPL",
-        screener="america",
-        exchange="NASDAQ",
-        interval=Interval.ONE_DAY
-    )
+    cache_key = make_key("AAPL", "america", "NASDAQ", Interval.ONE_DAY)
     
-    # Create bars spanning hot and cold tiers
-    now = datetime.now()
-    bars = []
-    
-    # Recent bars (hot tier) - last 30 days
-    for i in range(30):
-        dt = now - timedelta(days=i)
-        bars.append(Bar(
-            timestamp=int(dt.timestamp()),
-            open=150.0,
-            high=155.0,
-            low=148.0,
-            close=152.0,
-            volume=1000000.0
-        ))
-    
-    # Old bars (cold tier) - 100-130 days ago
-    for i in range(100, 130):
-        dt = now - timedelta(days=i)
-        bars.append(Bar(
-            timestamp=int(dt.timestamp()),
-            open=140.0,
-            high=145.0,
-            low=138.0,
-            close=142.0,
-            volume=900000.0
-        ))
-    
-    bars.reverse()
+    # Create bars spanning hot and cold tiers: recent bars (hot tier) from
+    # the last 30 days and old bars (cold tier) from 100-130 days ago
+    now = int(datetime.now().timestamp())
+    days_ago = np.concatenate([np.arange(30), np.arange(100, 130)])
+    hot = days_ago < 30
+    bars = make_bars(
+        timestamps=now - days_ago * 86400,
+        open=np.where(hot, 150.0, 140.0),
+        high=np.where(hot, 155.0, 145.0),
+        low=np.where(hot, 148.0, 138.0),
+        close=np.where(hot, 152.0, 142.0),
+        volume=np.where(hot, 1000000.0, 900000.0)
+    )
     
     print(f"Storing {len(bars)} bars spanning hot and cold tiers...")
     success = await cache_manager.put(cache_key, bars)
@@ -167,8 +119,8 @@ async def test_tier_partitioning():
     
     # Retrieve all bars
     time_range = TimeRange(
-        start_timestamp=bars[0].timestamp,
-        end_timestamp=bars[-1].timestamp
+        start_timestamp=int(bars.timestamps[0]),
+        end_timestamp=int(bars.timestamps[-1])
     )
     
     print(f"Retrieving bars from both tiers...")
@@ -182,6 +134,33 @@ async def test_tier_partitioning():
     
     return success
 
+def test_hot_key_promotion():
+    """Test that only keys read repeatedly over time become hot."""
+    print("\n=== Testing Hot Key Promotion ===")
+    
+    tracker = HotKeyTracker(capacity=2)
+    interval = HotKeyTracker.MIN_READ_INTERVAL
+    
+    # A burst of reads counts once, however many there are
+    for _ in range(5):
+        tracker.record_access("burst", now=0.0)
+    assert not tracker.is_hot("burst")
+    
+    # Reads spread over a few minutes promote; reads hours apart decay away
+    for i in range(3):
+        tracker.record_access("c", now=i * interval)
+        tracker.record_access("a", now=i * HotKeyTracker.SCORE_HALF_LIFE * 4)
+    print(f"Hot keys: {list(tracker.hot_queue)}")
+    assert tracker.is_hot("c")
+    assert not tracker.is_hot("a")
+    
+    # Exceeding capacity demotes the least recently read hot key
+    for key in ["x", "y"]:
+        for i in range(3):
+            tracker.record_access(key, now=1000.0 + i * interval)
+    assert list(tracker.hot_queue) == ["x", "y"]
+    assert "c" in tracker.cold_queue
+
 async def main():
     """Run all cache tests."""
     print("Starting cache tests...")
@@ -200,6 +179,10 @@ async def main():
         result3 = await test_tier_partitioning()
         print(f"✓ Tier partitioning test: {'PASSED' if result3 else 'FAILED'}")
         
+        # Test 4: Hot key promotion
+        test_hot_key_promotion()
+        print("✓ Hot key promotion test: PASSED")
+        
         print("\n=== All Tests Complete ===")
         
     except Exception as e:
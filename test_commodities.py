@@ -1,4 +1,5 @@
 from tradingview_ta import TA_Handler, Interval, Exchange
+import tv_session  # noqa: F401 - shares one keep-alive session across TradingView calls
 
 def test_symbol(symbol, screener, exchange):
     print(f"Testing {symbol} on {exchange} ({screener})...")
@@ -46,8 +46,8 @@ async def test_btc_analysis():
     print(f"\nRate Limiter Stats after 2nd call:")
     print(f"  Requests this minute: {stats2['requests_this_minute']}")
     
-    # Note: We expect 2 requests because we still fetch indicators from API
-    # but the OHLCV data should be cached
+    # Note: We expect 1 request - the bar and indicators share one API response,
+    # and the 2nd call is served from cache
     
     return True
 
@@ -78,11 +78,17 @@ async def test_rate_limiting_multiple_calls():
     
     symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
     
-    print(f"Making {len(symbols)} rapid API calls...")
+    print(f"Making {len(symbols)} concurrent API calls...")
     
-    for symbol in symbols:
-        data = await get_analysis_data(symbol, "crypto", "BINANCE", "1d")
-        if data:
+    results = await asyncio.gather(
+        *[get_analysis_data(symbol, "crypto", "BINANCE", "1d") for symbol in symbols],
+        return_exceptions=True
+    )
+    
+    for symbol, data in zip(symbols, results):
+        if isinstance(data, Exception):
+            print(f"  ✗ {symbol}: Error - {data}")
+        elif data:
             print(f"  ✓ {symbol}: ${data.get('close', 0):,.2f}")
         else:
             print(f"  ✗ {symbol}: Failed")
@@ -71,8 +71,12 @@ async def test_multi_timeframe():
     symbol = "BTCUSDT"
     intervals = ["1h", "4h", "1d"]
     
-    for interval in intervals:
-        data = await get_analysis_data(symbol, "crypto", "BINANCE", interval)
+    # Timeframes are independent, so fetch them concurrently
+    results = await asyncio.gather(
+        *(get_analysis_data(symbol, "crypto", "BINANCE", interval) for interval in intervals)
+    )
+    
+    for interval, data in zip(intervals, results):
         if data:
             print(f"  ✓ {symbol} {interval}: ${data.get('close', 0):,.2f}")
         else:
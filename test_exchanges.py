@@ -3,7 +3,9 @@
 
 import asyncio
 from server import get_analysis_data
-import time
+
+# Seconds to wait for each exchange before reporting it as unavailable
+PROBE_TIMEOUT = 5
 
 async def main():
     symbol = "USDJPY"
@@ -14,18 +16,24 @@ async def main():
     print(f"Testing exchanges for {symbol} on {timeframe} timeframe")
     print("=" * 70)
 
-    for exchange in exchanges:
-        try:
-            data = await get_analysis_data(symbol, screener, exchange, timeframe)
-            if data and data.get('close') is not None:
-                print(f"✅ {exchange:10s}: Available - Close: {data.get('close'):.4f}, PSAR: {data.get('psar')}, FI: {data.get('fi')}")
-            else:
-                print(f"❌ {exchange:10s}: No data returned")
-            # Small delay to be nice to the API
-            await asyncio.sleep(2)
-        except Exception as e:
-            print(f"❌ {exchange:10s}: Error - {str(e)}")
-            await asyncio.sleep(2)
+    # Probe all exchanges at once, each bounded by a timeout; the rate limiter paces the API calls
+    results = await asyncio.gather(
+        *[
+            asyncio.wait_for(get_analysis_data(symbol, screener, exchange, timeframe), timeout=PROBE_TIMEOUT)
+            for exchange in exchanges
+        ],
+        return_exceptions=True
+    )
+
+    for exchange, data in zip(exchanges, results):
+        if isinstance(data, asyncio.TimeoutError):
+            print(f"❌ {exchange:10s}: Timed out after {PROBE_TIMEOUT}s")
+        elif isinstance(data, Exception):
+            print(f"❌ {exchange:10s}: Error - {str(data)}")
+        elif data and data.get('close') is not None:
+            print(f"✅ {exchange:10s}: Available - Close: {data.get('close'):.4f}, PSAR: {data.get('psar')}, FI: {data.get('fi')}")
+        else:
+            print(f"❌ {exchange:10s}: No data returned")
 
 if __name__ == "__main__":
     asyncio.run(main())
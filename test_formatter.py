@@ -0,0 +1,81 @@
+"""
+Test report formatting without any API calls.
+Uses a hand-built Analysis object so the output can be checked offline.
+"""
+from tradingview_ta import Analysis
+from formatter import format_analysis, format_analysis_sections, format_cached_analysis
+
+def make_analysis(**indicators):
+    """Build an Analysis object with the given indicator overrides."""
+    analysis = Analysis()
+    analysis.summary = {"RECOMMENDATION": "BUY", "BUY": 12, "SELL": 3, "NEUTRAL": 11}
+    analysis.oscillators = {"RECOMMENDATION": "NEUTRAL"}
+    analysis.moving_averages = {"RECOMMENDATION": "STRONG_BUY"}
+    analysis.indicators = {
+        "open": 100.0,
+        "close": 110.0,
+        "high": 115.0,
+        "low": 95.0,
+        "RSI": 55.0,
+        "MACD.macd": 1.5,
+        "EMA20": 105.0,
+        "SMA50": 101.0,
+        "SMA200": 90.0,
+        "P.SAR": 98.0,
+        "ADX": 27.0,
+        "AO": 2.0,
+        "AO[1]": 1.0,
+    }
+    analysis.indicators.update(indicators)
+    return analysis
+
+def test_format_analysis_bullish():
+    """Test the full report for a bullish setup."""
+    output = format_analysis(make_analysis(), "BTCUSDT", "BINANCE", "1d")
+    print(output)
+
+    assert output.startswith("Analysis for BTCUSDT on BINANCE (1d):\n")
+    assert "🟢 Bullish Candle (Close > Open)" in output
+    assert "Body size: 10.00 (50.0% of range)" in output
+    assert "RSI: 55.00 (Neutral)" in output
+    assert "Parabolic SAR: 98.00 (Price above SAR - Bullish trend)" in output
+    assert "ADX: 27.00 (Strong trend)" in output
+    assert "Awesome Oscillator: 2.00 (Bullish momentum increasing)" in output
+    assert "🟢 BULLISH (4 bullish vs 0 bearish signals)" in output
+
+def test_format_analysis_missing_indicators():
+    """Test that indicators reported as None are skipped, not formatted."""
+    output = format_analysis(make_analysis(RSI=None, **{"P.SAR": None}), "BTCUSDT", "BINANCE", "1d")
+
+    assert "RSI:" not in output
+    assert "Parabolic SAR:" not in output
+    assert "🟢 BULLISH (3 bullish vs 0 bearish signals)" in output
+
+def test_format_analysis_sections():
+    """Test that the report sections join back into the full report."""
+    analysis = make_analysis()
+    sections = format_analysis_sections(analysis, "BTCUSDT", "BINANCE", "4h")
+
+    assert len(sections) == 4
+    assert sections[0].startswith("Analysis for BTCUSDT on BINANCE (4h):")
+    assert sections[1].startswith("Candle Analysis:")
+    assert sections[2].startswith("Oscillators:")
+    assert "TREND DIRECTION" in sections[3]
+    assert "".join(sections) == format_analysis(analysis, "BTCUSDT", "BINANCE", "4h")
+
+def test_format_cached_analysis():
+    """Test the simplified report used for cached data."""
+    data = {"open": 110.0, "close": 100.0, "high": 115.0, "low": 95.0}
+    output = format_cached_analysis(data, "ETHUSDT", "BINANCE", "1h")
+
+    assert output.startswith("Analysis for ETHUSDT on BINANCE (1h) [FROM CACHE]:\n\n")
+    assert "Open: 110.00, Close: 100.00, High: 115.00, Low: 95.00" in output
+    assert "🔴 Bearish Candle (Close < Open)" in output
+    assert "Full technical indicators unavailable" in output
+
+if __name__ == "__main__":
+    test_format_analysis_bullish()
+    test_format_analysis_missing_indicators()
+    test_format_analysis_sections()
+    test_format_cached_analysis()
+    print("✓ ALL FORMATTER TESTS PASSED")
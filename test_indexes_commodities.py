@@ -1,3 +1,6 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import vertexai
 from vertexai.generative_models import GenerativeModel, Tool, FunctionDeclaration
 from server import get_analysis
@@ -6,15 +9,15 @@ import sys
 # Define Tool Functions
 def get_crypto_analysis(symbol: str, exchange: str = "BINANCE", interval: str = "1d"):
     """Get technical analysis for a crypto pair."""
-    return get_analysis(symbol, "crypto", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "crypto", exchange, interval))
 
 def get_stock_analysis(symbol: str, exchange: str = "NASDAQ", interval: str = "1d"):
     """Get technical analysis for a stock."""
-    return get_analysis(symbol, "america", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "america", exchange, interval))
 
 def get_forex_analysis(symbol: str, exchange: str = "FX_IDC", interval: str = "1d"):
     """Get technical analysis for a forex pair."""
-    return get_analysis(symbol, "forex", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "forex", exchange, interval))
 
 def get_index_analysis(symbol: str, exchange: str = "CBOE", interval: str = "1d"):
     """Get technical analysis for a US index."""
@@ -27,46 +30,69 @@ def get_index_analysis(symbol: str, exchange: str = "CBOE", interval: str = "1d"
     if symbol in index_exchanges:
         exchange = index_exchanges[symbol]
     
-    return get_analysis(symbol, "america", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "america", exchange, interval))
 
 def get_commodity_analysis(symbol: str, exchange: str = "TVC", interval: str = "1d"):
     """Get technical analysis for commodities (energy, metals)."""
     if symbol == "XAUUSD":
-        return get_analysis(symbol, "cfd", "FX_IDC", interval)
+        return asyncio.run(get_analysis(symbol, "cfd", "FX_IDC", interval))
     
-    return get_analysis(symbol, "cfd", exchange, interval)
+    return asyncio.run(get_analysis(symbol, "cfd", exchange, interval))
 
-def run_test():
-    # Initialize Vertex AI
-    PROJECT_ID = "sp500trading"
-    LOCATION = "us-central1"
-    
-    vertexai.init(project=PROJECT_ID, location=LOCATION)
+PROJECT_ID = "sp500trading"
+LOCATION = "us-central1"
+
+# Model with registered tools, built once and reused by every run_test() call
+_MODEL = None
+
+def _get_model() -> GenerativeModel:
+    """Initialize Vertex AI and build the tool-enabled model on first use."""
+    global _MODEL
+    if _MODEL is None:
+        vertexai.init(project=PROJECT_ID, location=LOCATION)
 
-    # Define Function Declarations
-    get_crypto_analysis_func = FunctionDeclaration.from_func(get_crypto_analysis)
-    get_stock_analysis_func = FunctionDeclaration.from_func(get_stock_analysis)
-    get_forex_analysis_func = FunctionDeclaration.from_func(get_forex_analysis)
-    get_index_analysis_func = FunctionDeclaration.from_func(get_index_analysis)
-    get_commodity_analysis_func = FunctionDeclaration.from_func(get_commodity_analysis)
+        # Define Function Declarations
+        get_crypto_analysis_func = FunctionDeclaration.from_func(get_crypto_analysis)
+        get_stock_analysis_func = FunctionDeclaration.from_func(get_stock_analysis)
+        get_forex_analysis_func = FunctionDeclaration.from_func(get_forex_analysis)
+        get_index_analysis_func = FunctionDeclaration.from_func(get_index_analysis)
+        get_commodity_analysis_func = FunctionDeclaration.from_func(get_commodity_analysis)
 
-    # Create the tools list
-    tools = Tool(
-        function_declarations=[
-            get_crypto_analysis_func,
-            get_stock_analysis_func,
-            get_forex_analysis_func,
-            get_index_analysis_func,
-            get_commodity_analysis_func,
-        ]
-    )
+        # Create the tools list
+        tools = Tool(
+            function_declarations=[
+                get_crypto_analysis_func,
+                get_stock_analysis_func,
+                get_forex_analysis_func,
+                get_index_analysis_func,
+                get_commodity_analysis_func,
+            ]
+        )
 
-    # Initialize the model with tools
-    model = GenerativeModel(
-        "gemini-2.5-flash",
-        tools=[tools],
-    )
+        # Initialize the model with tools
+        _MODEL = GenerativeModel(
+            "gemini-2.5-flash",
+            tools=[tools],
+        )
+    return _MODEL
 
+def _call_tool(function_name: str, function_args: dict):
+    """Run the tool function the model asked for."""
+    result = None
+    if function_name == "get_crypto_analysis":
+        result = get_crypto_analysis(**function_args)
+    elif function_name == "get_stock_analysis":
+        result = get_stock_analysis(**function_args)
+    elif function_name == "get_forex_analysis":
+        result = get_forex_analysis(**function_args)
+    elif function_name == "get_index_analysis":
+        result = get_index_analysis(**function_args)
+    elif function_name == "get_commodity_analysis":
+        result = get_commodity_analysis(**function_args)
+    return result
+
+def run_test():
+    model = _get_model()
     chat = model.start_chat()
     prompt = "Analyze SPX, DJI, and XAUUSD to give me an overview of the markets."
     
@@ -79,31 +105,23 @@ def run_test():
         function_calls = [part.function_call for part in response_parts if part.function_call]
         
         if function_calls:
-            function_responses = []
+            calls = []
             for function_call in function_calls:
-                function_name = function_call.name
-                function_args = function_call.args
-                print(f"Calling Tool: {function_name} with {function_args}")
-                
-                result = None
-                if function_name == "get_crypto_analysis":
-                    result = get_crypto_analysis(**function_args)
-                elif function_name == "get_stock_analysis":
-                    result = get_stock_analysis(**function_args)
-                elif function_name == "get_forex_analysis":
-                    result = get_forex_analysis(**function_args)
-                elif function_name == "get_index_analysis":
-                    result = get_index_analysis(**function_args)
-                elif function_name == "get_commodity_analysis":
-                    result = get_commodity_analysis(**function_args)
-                
-                if result:
-                    function_responses.append(
-                        vertexai.generative_models.Part.from_function_response(
-                            name=function_name,
-                            response={"content": result}
-                        )
-                    )
+                print(f"Calling Tool: {function_call.name} with {function_call.args}")
+                calls.append(partial(_call_tool, function_call.name, function_call.args))
+            
+            # Each tool is an independent TradingView round-trip; run them together
+            with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+                results = list(executor.map(lambda call: call(), calls))
+            
+            function_responses = [
+                vertexai.generative_models.Part.from_function_response(
+                    name=function_call.name,
+                    response={"content": result}
+                )
+                for function_call, result in zip(function_calls, results)
+                if result
+            ]
             
             if function_responses:
                 final_response = chat.send_message(function_responses)
@@ -1,6 +1,8 @@
+import asyncio
 from tradingview_ta import TA_Handler, Interval
+import tv_session  # noqa: F401 - shares one keep-alive session across TradingView calls
 
-def test_indicators():
+async def test_indicators():
     print("Testing enhanced indicators...")
     try:
         handler = TA_Handler(
@@ -9,7 +11,8 @@ def test_indicators():
             exchange="BINANCE",
             interval=Interval.INTERVAL_15_MINUTES
         )
-        analysis = handler.get_analysis()
+        # OHLC and indicators come back in one scan request; run it off the event loop
+        analysis = await asyncio.to_thread(handler.get_analysis)
         
         print("\nAvailable indicators:")
         for key in sorted(analysis.indicators.keys()):
@@ -19,4 +22,4 @@ def test_indicators():
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    test_indicators()
+    asyncio.run(test_indicators())
@@ -3,70 +3,138 @@ Simple integration test for the caching system.
 Tests rate limiting and basic functionality without requiring GCP auth.
 """
 import asyncio
+import logging
+import sys
 import time
-from rate_limiter import rate_limiter
+import types
+from rate_limiter import rate_limiter, RateLimiter, RateLimitExceeded
+
+logger = logging.getLogger(__name__)
 
 async def test_rate_limiting():
     """Test that rate limiting works correctly."""
-    print("\n=== Testing Rate Limiting ===")
+    logger.info("=== Testing Rate Limiting ===")
     
     # Track execution times
     call_times = []
     
     async def mock_api_call():
-        """Simulate an API call."""
+        """Simulate an API call with 100ms of network latency."""
         current_time = time.time()
         call_times.append(current_time)
+        await asyncio.sleep(0.1)
         return f"Call at {current_time}"
     
-    # Make several rapid calls
-    print("Making 5 rapid API calls with rate limiting...")
+    # Make several rapid calls at once; they fit in the window, so they run concurrently
+    logger.info("Making 5 rapid API calls with rate limiting...")
     start_time = time.time()
-    
-    for i in range(5):
-        result = await rate_limiter.execute(mock_api_call)
-        print(f"  Call {i+1}: {result}")
-    
+    results = await asyncio.gather(*[rate_limiter.execute(mock_api_call) for _ in range(5)])
     end_time = time.time()
+    
+    # Report after the timed section so logging doesn't count towards total_time
     total_time = end_time - start_time
+    if logger.isEnabledFor(logging.INFO):
+        for i, result in enumerate(results):
+            logger.info(f"  Call {i+1}: {result}")
     
-    print(f"\nTotal time for 5 calls: {total_time:.2f}s")
-    print(f"Average time per call: {total_time/5:.2f}s")
+    assert len(call_times) == 5
+    assert total_time < 0.5, "Calls within the rate limit should not be serialized"
+    
+    logger.info(f"Total time for 5 calls: {total_time:.2f}s")
+    logger.info(f"Average time per call: {total_time/5:.2f}s")
     
     # Check rate limiter stats
-    stats = rate_limiter.get_stats()
-    print(f"\nRate Limiter Stats:")
-    print(f"  Requests this minute: {stats['requests_this_minute']}")
-    print(f"  Requests this hour: {stats['requests_this_hour']}")
-    print(f"  Max per minute: {stats['max_per_minute']}")
-    print(f"  Max per hour: {stats['max_per_hour']}")
+    if logger.isEnabledFor(logging.INFO):
+        stats = rate_limiter.get_stats()
+        logger.info("Rate Limiter Stats:")
+        logger.info(f"  Requests this minute: {stats['requests_this_minute']}")
+        logger.info(f"  Requests this hour: {stats['requests_this_hour']}")
+        logger.info(f"  Max per minute: {stats['max_per_minute']}")
+        logger.info(f"  Max per hour: {stats['max_per_hour']}")
     
     return True
 
+async def test_rate_limiting_burst_over_capacity():
+    """Test that a concurrent burst larger than the window admits exactly the window's capacity."""
+    logger.info("=== Testing Concurrent Burst Over Capacity ===")
+    
+    limiter = RateLimiter()
+    limiter.enabled = True
+    limiter.max_per_minute = 3
+    
+    async def mock_api_call():
+        """Simulate an API call with 100ms of network latency."""
+        await asyncio.sleep(0.1)
+        return "ok"
+    
+    results = await asyncio.gather(
+        *[limiter.execute(mock_api_call) for _ in range(5)],
+        return_exceptions=True
+    )
+    admitted = [result for result in results if result == "ok"]
+    rejected = [result for result in results if isinstance(result, RateLimitExceeded)]
+    
+    logger.info(f"  Admitted: {len(admitted)}, rejected: {len(rejected)}")
+    assert len(admitted) == 3
+    assert len(rejected) == 2
+    assert limiter.get_stats()["requests_this_minute"] == 3
+    
+    return True
+
+def test_redis_client_per_loop():
+    """Test that each event loop gets one Redis client and finished loops' clients are released."""
+    logger.info("=== Testing Redis Client Per Event Loop ===")
+    
+    fake_asyncio = types.SimpleNamespace(from_url=lambda url: object())
+    fake_redis = types.ModuleType("redis")
+    fake_redis.asyncio = fake_asyncio
+    saved = {name: sys.modules.get(name) for name in ("redis", "redis.asyncio")}
+    sys.modules.update({"redis": fake_redis, "redis.asyncio": fake_asyncio})
+    try:
+        limiter = RateLimiter()
+        limiter.redis_url = "redis://localhost:6379"
+        
+        async def same_loop_twice():
+            return limiter._get_redis(), limiter._get_redis()
+        
+        first, second = asyncio.run(same_loop_twice())
+        assert first is second
+        
+        # A later asyncio.run() gets its own client; the finished loop's client is dropped
+        third, _ = asyncio.run(same_loop_twice())
+        assert third is not first
+        assert list(limiter._redis_clients.values()) == [third]
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
 async def test_server_import():
     """Test that server module imports correctly."""
-    print("\n=== Testing Server Import ===")
+    logger.info("=== Testing Server Import ===")
     
     try:
         from server import get_analysis_data
-        print("✓ Server module imported successfully")
-        print("✓ get_analysis_data function is available")
+        logger.info("✓ Server module imported successfully")
+        logger.info("✓ get_analysis_data function is available")
         return True
     except Exception as e:
-        print(f"✗ Failed to import server: {e}")
+        logger.error(f"✗ Failed to import server: {e}")
         return False
 
 async def test_data_fetcher():
     """Test data fetcher module."""
-    print("\n=== Testing Data Fetcher ===")
+    logger.info("=== Testing Data Fetcher ===")
     
     try:
         from data_fetcher import data_fetcher
-        print("✓ Data fetcher module imported successfully")
-        print("✓ Data fetcher instance created")
+        logger.info("✓ Data fetcher module imported successfully")
+        logger.info("✓ Data fetcher instance created")
         return True
     except Exception as e:
-        print(f"✗ Failed to import data_fetcher: {e}")
+        logger.error(f"✗ Failed to import data_fetcher: {e}")
         return False
 
 async def main():
@@ -89,6 +157,15 @@ async def main():
     result3 = await test_rate_limiting()
     results.append(("Rate Limiting", result3))
     
+    # Test 4: Burst over the rate limit
+    result4 = await test_rate_limiting_burst_over_capacity()
+    results.append(("Rate Limit Burst", result4))
+    
+    # Test 5: Redis client per event loop
+    # (sync test: it runs its own event loops, so it needs a worker thread here)
+    await asyncio.to_thread(test_redis_client_per_loop)
+    results.append(("Redis Client Per Loop", True))
+    
     # Summary
     print("\n" + "=" * 60)
     print("TEST SUMMARY")
@@ -109,5 +186,6 @@ async def main():
     return all_passed
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     success = asyncio.run(main())
     exit(0 if success else 1)
@@ -0,0 +1,76 @@
+"""
+Test the in-process TTL cache used for indicator responses.
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from memory_cache import MemoryCache
+
+def test_get_put_and_expiry():
+    """Test that entries are returned until their TTL elapses."""
+    cache = MemoryCache()
+    cache.put(("BTCUSDT", "crypto", "BINANCE", "1m"), "analysis", ttl=0.05)
+
+    assert cache.get(("BTCUSDT", "crypto", "BINANCE", "1m")) == "analysis"
+    assert cache.get(("ETHUSDT", "crypto", "BINANCE", "1m")) is None
+
+    time.sleep(0.06)
+    assert cache.get(("BTCUSDT", "crypto", "BINANCE", "1m")) is None
+    assert len(cache) == 0
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted when full."""
+    cache = MemoryCache(maxsize=2)
+    cache.put("a", 1, ttl=60)
+    cache.put("b", 2, ttl=60)
+    cache.get("a")
+    cache.put("c", 3, ttl=60)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_hit_miss_stats():
+    """Test that lookups are counted as hits and misses."""
+    cache = MemoryCache()
+    cache.put("a", 1, ttl=60)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert abs(stats["hit_ratio"] - 2 / 3) < 1e-9
+
+def test_concurrent_expiry_and_eviction():
+    """Test that threads expiring and evicting the same keys don't race."""
+    cache = MemoryCache(maxsize=8)
+
+    def churn(worker: int):
+        for i in range(2000):
+            key = i % 16
+            cache.put(key, worker, ttl=0.0001 if i % 3 else 60)
+            cache.get(key)
+            cache.get((key + 1) % 16)
+
+    # Switch threads as often as possible to expose unguarded check-then-act steps
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [executor.submit(churn, worker) for worker in range(8)]:
+                future.result()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert len(cache) <= 8
+    assert cache.hits + cache.misses == 8 * 2000 * 2
+
+if __name__ == "__main__":
+    test_get_put_and_expiry()
+    test_lru_eviction()
+    test_hit_miss_stats()
+    test_concurrent_expiry_and_eviction()
+    print("✓ ALL MEMORY CACHE TESTS PASSED")
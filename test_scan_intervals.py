@@ -0,0 +1,51 @@
+"""
+Test fetching several intervals of one symbol in a single scanner request.
+"""
+import json
+import tradingview_ta.main as tv_main
+from tradingview_ta import TradingView
+from data_fetcher import scan_intervals
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload: dict):
+        self.text = json.dumps(payload)
+
+class FakeSession:
+    """Records scanner posts and answers with one value per requested column."""
+
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        self.posts.append((url, json))
+        values = [0.5 if column.startswith("Recommend") else float(i) for i, column in enumerate(json["columns"])]
+        return FakeResponse({"data": [{"s": json["symbols"]["tickers"][0], "d": values}]})
+
+def test_scan_intervals_single_request():
+    """Test that all intervals come back from one POST, split per interval."""
+    session = FakeSession()
+    original = tv_main.requests
+    tv_main.requests = session
+    try:
+        analyses = scan_intervals("BTCUSDT", "crypto", "BINANCE", ["5m", "1h", "1d"])
+    finally:
+        tv_main.requests = original
+
+    assert len(session.posts) == 1
+    url, payload = session.posts[0]
+    width = len(TradingView.indicators)
+    assert url.endswith("/crypto/scan")
+    assert payload["columns"][0] == "Recommend.Other|5"
+    assert payload["columns"][width] == "Recommend.Other|60"
+    assert payload["columns"][2 * width] == "Recommend.Other"
+
+    assert list(analyses) == ["5m", "1h", "1d"]
+    assert analyses["1h"].interval == "1h"
+    # Each interval gets its own slice of the response values
+    assert analyses["1h"].indicators["RSI"] == float(width + TradingView.indicators.index("RSI"))
+
+if __name__ == "__main__":
+    test_scan_intervals_single_request()
+    print("✓ SCAN INTERVALS TEST PASSED")
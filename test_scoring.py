@@ -0,0 +1,61 @@
+"""
+Test vectorized trend scoring without any API calls.
+"""
+import numpy as np
+import server
+from scoring import _score_batch_numpy, encode_recommendations, score_batch, score_signals
+
+def test_score_signals():
+    """Test scores for bullish, bearish, neutral and missing-data rows."""
+    nan = float("nan")
+    scores = score_signals(
+        recs=["STRONG_BUY", "SELL", "NEUTRAL", "BUY"],
+        rsi=[25.0, 75.0, 50.0, nan],
+        close=[110.0, 90.0, 100.0, 100.0],
+        psar=[100.0, 95.0, 100.0, nan],
+        ao=[1.5, -2.0, 0.0, nan],
+    )
+    print(f"Scores: {scores}")
+
+    assert scores.dtype == np.int16
+    # 2 (rec) + 1 (RSI oversold) + 1 (above SAR) + 1 (AO positive)
+    assert scores[0] == 5
+    # Mirror image of the bullish row
+    assert scores[1] == -5
+    # Close at SAR counts as bearish, everything else neutral
+    assert scores[2] == -1
+    # Missing indicators contribute nothing
+    assert scores[3] == 2
+
+def test_score_batch_matches_numpy():
+    """Test the active kernel (numba when installed) against the NumPy version."""
+    rng = np.random.default_rng(0)
+    n = 1000
+    recs = rng.choice(["STRONG_BUY", "BUY", "NEUTRAL", "SELL", "STRONG_SELL"], n)
+    rsi = rng.uniform(0, 100, n)
+    close = rng.uniform(90, 110, n)
+    psar = rng.uniform(90, 110, n)
+    ao = rng.normal(0, 1, n)
+    rsi[::7] = np.nan
+    psar[::11] = np.nan
+
+    codes = encode_recommendations(recs)
+    expected = _score_batch_numpy(codes, rsi, close, psar, ao)
+    np.testing.assert_array_equal(score_batch(codes, rsi, close, psar, ao), expected)
+
+async def test_trend_scores_mcp_tool(monkeypatch):
+    """Test that the get_trend_scores MCP tool is listed and returns the formatted scores."""
+    async def fake_scores(symbols, screener, exchange, interval):
+        assert (symbols, screener, exchange, interval) == (["AAA", "BBB"], "crypto", "BINANCE", "1d")
+        return {"BBB": -1, "AAA": 2}
+
+    monkeypatch.setattr(server, "get_trend_scores", fake_scores)
+    assert "get_trend_scores" in [tool.name for tool in server._TOOLS]
+
+    contents = await server.call_tool("get_trend_scores", {"symbols": ["AAA", "BBB"]})
+    assert contents[0].text.splitlines()[1:] == ["AAA: +2", "BBB: -1"]
+
+if __name__ == "__main__":
+    test_score_signals()
+    test_score_batch_matches_numpy()
+    print("✓ SCORING TEST PASSED")
@@ -0,0 +1,31 @@
+"""
+Test that concurrent get_analysis calls for the same key share one fetch.
+"""
+import asyncio
+import pytest
+import server
+
+async def test_joiner_sees_leader_exception(monkeypatch):
+    """Test that a coalesced caller gets the leader's error, not a cancellation."""
+    release = asyncio.Event()
+    fetches = []
+
+    async def failing_fetch(symbol, screener, exchange, interval, on_progress=None):
+        fetches.append(symbol)
+        await release.wait()
+        raise ValueError("upstream failed")
+
+    monkeypatch.setattr(server, "_get_analysis_uncoalesced", failing_fetch)
+
+    args = ("SINGLEFLIGHT", "crypto", "TEST", "1m")
+    leader = asyncio.create_task(server.get_analysis(*args))
+    while not fetches:
+        await asyncio.sleep(0)
+    joiner = asyncio.create_task(server.get_analysis(*args))
+    await asyncio.sleep(0.01)
+    release.set()
+
+    for task in (leader, joiner):
+        with pytest.raises(ValueError, match="upstream failed"):
+            await task
+    assert fetches == ["SINGLEFLIGHT"]
@@ -0,0 +1,29 @@
+"""
+Test the multi-timeframe fetch used by the agent and trade advisor.
+"""
+import server
+
+async def test_unbatched_timeframes_wait_for_rate_limit(monkeypatch):
+    """Test that timeframes the batch missed are fetched one at a time after waiting for capacity."""
+    events = []
+
+    async def no_prefetch(symbol, screener, exchange, intervals):
+        return 0
+
+    async def wait_for_slot():
+        events.append("wait")
+
+    async def fake_get_analysis(symbol, screener, exchange, interval):
+        events.append(interval)
+        if interval == "15m":
+            raise ValueError("boom")
+        return f"report {interval}"
+
+    monkeypatch.setattr(server.data_fetcher, "prefetch_analyses", no_prefetch)
+    monkeypatch.setattr(server.rate_limiter, "wait_for_slot", wait_for_slot)
+    monkeypatch.setattr(server, "get_analysis", fake_get_analysis)
+
+    reports = await server.get_timeframe_reports("PACED", "crypto", "TEST", ["5m", "15m", "1h"])
+
+    assert events == ["wait", "5m", "wait", "15m", "wait", "1h"]
+    assert reports == {"5m": "report 5m", "15m": "Error: boom", "1h": "report 1h"}
@@ -0,0 +1,19 @@
+"""
+Test that tradingview_ta requests go through the shared session.
+"""
+import tradingview_ta.main as tv_main
+from tv_session import POOL_MAXSIZE, Http2Session, tv_session
+
+def test_session_installed():
+    """Test that tradingview_ta posts through the pooled session."""
+    assert tv_main.requests is tv_session
+
+    if isinstance(tv_session, Http2Session):
+        assert tv_session.client._transport._pool._max_connections == POOL_MAXSIZE
+    else:
+        adapter = tv_session.get_adapter("https://scanner.tradingview.com/crypto/scan")
+        assert adapter._pool_maxsize == POOL_MAXSIZE
+
+if __name__ == "__main__":
+    test_session_installed()
+    print("✓ SESSION TEST PASSED")
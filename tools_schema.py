@@ -0,0 +1,57 @@
+"""
+MCP tool definitions for the TradingView analyzer server.
+The three analysis tools share one input schema shape; only the symbol
+example and default exchange differ. get_trend_scores scans many symbols
+of one screener at once.
+"""
+
+INTERVAL_DESCRIPTION = "The interval (1m, 5m, 15m, 1h, 4h, 1d, 1W, 1M)"
+
+def analysis_input_schema(symbol_description: str, default_exchange: str) -> dict:
+    """Build the input schema shared by all analysis tools."""
+    return {
+        "type": "object",
+        "properties": {
+            "symbol": {"type": "string", "description": symbol_description},
+            "exchange": {"type": "string", "default": default_exchange, "description": "The exchange"},
+            "interval": {"type": "string", "default": "1d", "description": INTERVAL_DESCRIPTION}
+        },
+        "required": ["symbol"]
+    }
+
+# Keyword arguments for mcp.types.Tool, in the order tools are listed
+TOOL_SPECS = [
+    {
+        "name": "get_crypto_analysis",
+        "description": "Get technical analysis for a crypto pair",
+        "inputSchema": analysis_input_schema("The crypto symbol (e.g., 'BTCUSDT')", "BINANCE"),
+    },
+    {
+        "name": "get_stock_analysis",
+        "description": "Get technical analysis for a stock",
+        "inputSchema": analysis_input_schema("The stock symbol (e.g., 'TSLA')", "NASDAQ"),
+    },
+    {
+        "name": "get_forex_analysis",
+        "description": "Get technical analysis for a forex pair",
+        "inputSchema": analysis_input_schema("The forex symbol (e.g., 'EURUSD')", "FX_IDC"),
+    },
+    {
+        "name": "get_trend_scores",
+        "description": "Score the trend of many symbols at once (bullish minus bearish signals)",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "symbols": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "The symbols to scan (e.g., ['BTCUSDT', 'ETHUSDT'])"
+                },
+                "screener": {"type": "string", "default": "crypto", "description": "The screener (crypto, america, forex, cfd)"},
+                "exchange": {"type": "string", "default": "BINANCE", "description": "The exchange"},
+                "interval": {"type": "string", "default": "1d", "description": INTERVAL_DESCRIPTION}
+            },
+            "required": ["symbols"]
+        },
+    },
+]
@@ -1,6 +1,9 @@
+import asyncio
+from functools import cache, lru_cache
 import vertexai
 from vertexai.generative_models import GenerativeModel, Tool, FunctionDeclaration
-from server import get_analysis
+from server import get_timeframe_reports
+from formatter import REPORT_SEPARATOR, format_multi_timeframe_lines
 from typing import Dict, List
 import json
 
@@ -8,58 +11,72 @@ import json
 PROJECT_ID = "sp500trading"
 LOCATION = "us-central1"
 
-vertexai.init(project=PROJECT_ID, location=LOCATION)
+# asset_type -> (screener, exchange used when the caller leaves the BINANCE default)
+_ASSET_DEFAULTS = {
+    "crypto": ("crypto", "BINANCE"),
+    "stock": ("america", "NASDAQ"),
+    "forex": ("forex", "FX_IDC"),
+    "index": ("america", "CBOE"),
+    "commodity": ("cfd", "BINANCE"),
+}
 
-def get_multi_timeframe_analysis(symbol: str, asset_type: str = "crypto", exchange: str = "BINANCE") -> str:
+# Exchanges that always apply to a symbol of the given asset type
+_FIXED_EXCHANGES = {
+    ("index", "SPX"): "CBOE",
+    ("index", "DJI"): "DJ",
+    ("index", "IXIC"): "NASDAQ",
+    ("commodity", "XAUUSD"): "FX_IDC",
+}
+
+@lru_cache(maxsize=256)
+def resolve_market(symbol: str, asset_type: str, exchange: str = "BINANCE") -> tuple[str, str]:
     """
-    Get technical analysis across multiple timeframes (1m, 5m, 15m, 30m, 1h) for trading decisions.
+    Resolve the screener and exchange for a symbol.
+    
+    Args:
+        symbol: The trading symbol
+        asset_type: Type of asset (unknown types are treated as crypto)
+        exchange: Requested exchange
+        
+    Returns:
+        (screener, exchange) tuple
+    """
+    screener, default_exchange = _ASSET_DEFAULTS.get(asset_type, _ASSET_DEFAULTS["crypto"])
+    if asset_type == "index":
+        # Indexes always use their listing exchange
+        exchange = default_exchange
+    elif exchange == "BINANCE":
+        exchange = default_exchange
+    return screener, _FIXED_EXCHANGES.get((asset_type, symbol), exchange)
+
+async def get_multi_timeframe_analysis_async(symbol: str, asset_type: str = "crypto", exchange: str = "BINANCE") -> str:
+    """
+    Get technical analysis across multiple timeframes, fetching all timeframes concurrently.
     
     Args:
         symbol: The trading symbol (e.g., 'BTCUSDT', 'TSLA', 'SPX')
         asset_type: Type of asset - 'crypto', 'stock', 'forex', 'index', or 'commodity'
         exchange: The exchange (default varies by asset_type)
     """
-    # Map asset types to screeners
-    screener_map = {
-        "crypto": "crypto",
-        "stock": "america",
-        "forex": "forex",
-        "index": "america",
-        "commodity": "cfd"
-    }
-    
-    # Set default exchanges
-    if asset_type == "crypto" and exchange == "BINANCE":
-        exchange = "BINANCE"
-    elif asset_type == "stock" and exchange == "BINANCE":
-        exchange = "NASDAQ"
-    elif asset_type == "index":
-        index_exchanges = {"SPX": "CBOE", "DJI": "DJ", "IXIC": "NASDAQ"}
-        exchange = index_exchanges.get(symbol, "CBOE")
-    elif asset_type == "commodity" and symbol == "XAUUSD":
-        exchange = "FX_IDC"
-    
-    screener = screener_map.get(asset_type, "crypto")
+    screener, exchange = resolve_market(symbol, asset_type, exchange)
     
     timeframes = ["1m", "5m", "15m", "30m", "1h"]
-    results = {}
+    reports = await get_timeframe_reports(symbol, screener, exchange, timeframes)
     
-    for tf in timeframes:
-        try:
-            analysis_text = get_analysis(symbol, screener, exchange, tf)
-            results[tf] = analysis_text
-        except Exception as e:
-            results[tf] = f"Error: {str(e)}"
-    
-    # Format output
-    output = f"Multi-Timeframe Analysis for {symbol} on {exchange}\n"
-    output += "=" * 60 + "\n\n"
-    
-    for tf, result in results.items():
-        output += f"--- {tf.upper()} Timeframe ---\n"
-        output += result + "\n\n"
+    lines = format_multi_timeframe_lines(symbol, exchange, reports)
+    lines.append("")
+    return "\n".join(lines)
+
+def get_multi_timeframe_analysis(symbol: str, asset_type: str = "crypto", exchange: str = "BINANCE") -> str:
+    """
+    Get technical analysis across multiple timeframes (1m, 5m, 15m, 30m, 1h) for trading decisions.
     
-    return output
+    Args:
+        symbol: The trading symbol (e.g., 'BTCUSDT', 'TSLA', 'SPX')
+        asset_type: Type of asset - 'crypto', 'stock', 'forex', 'index', or 'commodity'
+        exchange: The exchange (default varies by asset_type)
+    """
+    return asyncio.run(get_multi_timeframe_analysis_async(symbol, asset_type, exchange))
 
 def generate_trade_recommendation(symbol: str, asset_type: str = "crypto", exchange: str = "BINANCE") -> str:
     """
@@ -88,99 +105,126 @@ Provide a structured recommendation."""
     
     return analysis
 
-# Define Function Declarations
-get_multi_timeframe_analysis_func = FunctionDeclaration.from_func(get_multi_timeframe_analysis)
-generate_trade_recommendation_func = FunctionDeclaration.from_func(generate_trade_recommendation)
-
-# Create the tools list
-tools = Tool(
-    function_declarations=[
-        get_multi_timeframe_analysis_func,
-        generate_trade_recommendation_func,
-    ]
-)
-
 # Define system instruction for the model
 system_instruction = """You are a financial analyst specializing in technical analysis for trading.
 Your goal is to provide clear, actionable trading recommendations based on the provided multi-timeframe analysis.
 Always aim to give entry, stop loss, and take profit levels, along with a confidence level and risk/reward ratio.
 Be concise and professional."""
 
-# Initialize the model with tools
-model = GenerativeModel(
-    "gemini-2.5-flash",
-    tools=[tools],
-    system_instruction=system_instruction
-)
+@cache
+def _get_model() -> GenerativeModel:
+    """Initialize Vertex AI and build the tool-enabled model on first use."""
+    vertexai.init(project=PROJECT_ID, location=LOCATION)
 
-def test_trade_recommendation():
-    chat = model.start_chat()
-    prompt = "Analyze BTCUSDT and give me entry, stop loss, and take profit recommendations based on 1m, 5m, 15m, 30m, and 1h timeframes."
+    # Define Function Declarations
+    get_multi_timeframe_analysis_func = FunctionDeclaration.from_func(get_multi_timeframe_analysis)
+    generate_trade_recommendation_func = FunctionDeclaration.from_func(generate_trade_recommendation)
+
+    # Create the tools list
+    tools = Tool(
+        function_declarations=[
+            get_multi_timeframe_analysis_func,
+            generate_trade_recommendation_func,
+        ]
+    )
+
+    # Initialize the model with tools
+    return GenerativeModel(
+        "gemini-2.5-flash",
+        tools=[tools],
+        system_instruction=system_instruction
+    )
+
+# Tool name -> function the model can call
+TOOL_FUNCTIONS = {
+    func.__name__: func
+    for func in (get_multi_timeframe_analysis, generate_trade_recommendation)
+}
+
+async def _stream_reply(chat, content) -> list:
+    """
+    Send a message and print the model's text as it streams in.
     
-    print(f"Sending Prompt: {prompt}\n")
+    Args:
+        chat: Chat session
+        content: Prompt text or function response parts
+        
+    Returns:
+        Function calls requested in the reply
+    """
+    function_calls = []
+    header_printed = False
+    async for chunk in await chat.send_message_async(content, stream=True):
+        for part in chunk.candidates[0].content.parts:
+            if part.function_call:
+                function_calls.append(part.function_call)
+            elif getattr(part, "text", None):
+                if not header_printed:
+                    print("\n" + REPORT_SEPARATOR)
+                    print("AGENT RECOMMENDATION")
+                    print(REPORT_SEPARATOR)
+                    header_printed = True
+                print(part.text, end="", flush=True)
+    if header_printed:
+        print()
+    return function_calls
+
+async def _run_tool(function_call):
+    """Run one model tool call in a worker thread (None for unknown tools)."""
+    print(f"Calling Tool: {function_call.name} with {function_call.args}\n")
+    func = TOOL_FUNCTIONS.get(function_call.name)
+    if func is None:
+        return None
+    return await asyncio.to_thread(func, **function_call.args)
+
+async def run_trade_recommendation(prompt: str, max_iterations: int = 5):
+    """
+    Chat with the model until it stops calling tools, streaming every reply.
     
-    try:
-        response = chat.send_message(prompt)
+    Args:
+        prompt: User prompt
+        max_iterations: Maximum rounds of function calling
+    """
+    chat = _get_model().start_chat()
+    function_calls = await _stream_reply(chat, prompt)
+    
+    # Handle multiple rounds of function calling
+    for _ in range(max_iterations):
+        if not function_calls:
+            break
         
-        # Handle multiple rounds of function calling
-        max_iterations = 5
-        iteration = 0
+        # Independent tool calls run at the same time
+        results = await asyncio.gather(*[_run_tool(fc) for fc in function_calls])
         
-        while iteration < max_iterations:
-            response_parts = response.candidates[0].content.parts
-            function_calls = [part.function_call for part in response_parts if part.function_call]
-            
-            # Check if there's text in the response
-            text_parts = [part.text for part in response_parts if hasattr(part, 'text') and part.text]
-            
-            if not function_calls:
-                # No more function calls, print final response
-                if text_parts:
-                    print("\n" + "=" * 60)
-                    print("AGENT RECOMMENDATION")
-                    print("=" * 60)
-                    for text in text_parts:
-                        print(text)
-                break
-            
-            # Execute function calls
-            function_responses = []
-            for function_call in function_calls:
-                function_name = function_call.name
-                function_args = function_call.args
-                print(f"Calling Tool: {function_name} with {function_args}\n")
+        function_responses = []
+        for function_call, result in zip(function_calls, results):
+            if result:
+                print("--- Tool Result (truncated) ---")
+                print(result[:300] + "..." if len(result) > 300 else result)
+                print()
                 
-                result = None
-                if function_name == "get_multi_timeframe_analysis":
-                    result = get_multi_timeframe_analysis(**function_args)
-                elif function_name == "generate_trade_recommendation":
-                    result = generate_trade_recommendation(**function_args)
-                
-                if result:
-                    print("--- Tool Result (truncated) ---")
-                    print(result[:300] + "..." if len(result) > 300 else result)
-                    print()
-                    
-                    function_responses.append(
-                        vertexai.generative_models.Part.from_function_response(
-                            name=function_name,
-                            response={"content": result}
-                        )
+                function_responses.append(
+                    vertexai.generative_models.Part.from_function_response(
+                        name=function_call.name,
+                        response={"content": result}
                     )
-            
-            if function_responses:
-                response = chat.send_message(function_responses)
-                iteration += 1
-            else:
-                break
-            
+                )
+        
+        if not function_responses:
+            break
+        function_calls = await _stream_reply(chat, function_responses)
+
+def test_trade_recommendation():
+    prompt = "Analyze BTCUSDT and give me entry, stop loss, and take profit recommendations based on 1m, 5m, 15m, 30m, and 1h timeframes."
+    
+    print(f"Sending Prompt: {prompt}\n")
+    
+    try:
+        asyncio.run(run_trade_recommendation(prompt))
     except Exception as e:
         print(f"Error: {e}")
         import traceback
         traceback.print_exc()
 
-
-
-
 if __name__ == "__main__":
     test_trade_recommendation()
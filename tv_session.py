@@ -0,0 +1,97 @@
+"""
+Shared HTTP session for TradingView scanner requests.
+tradingview_ta calls the module-level requests.post(), which opens a new
+TCP + TLS connection for every analysis. Installing a pooled Session in its
+place keeps connections to scanner.tradingview.com alive across calls.
+
+When httpx with HTTP/2 support (the h2 package, httpx[http2] in
+requirements.txt) is installed, requests are multiplexed over a single
+HTTP/2 connection instead of a pool of HTTP/1.1 connections.
+"""
+import atexit
+import logging
+from typing import Union
+import requests
+from requests.adapters import HTTPAdapter
+import tradingview_ta.main as tv_main
+
+try:
+    import h2  # noqa: F401 - required by httpx for http2=True
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive connections kept open to the scanner host (calls run in worker threads)
+POOL_MAXSIZE = 30
+
+# Seconds an idle connection is kept open
+KEEPALIVE_EXPIRY = 75
+
+class Http2Session:
+    """
+    Minimal requests-compatible post() on top of a thread-safe HTTP/2 httpx.Client.
+
+    tradingview_ta only reads status_code and text from the response, which
+    httpx responses provide.
+    """
+
+    def __init__(self):
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=POOL_MAXSIZE,
+                max_keepalive_connections=POOL_MAXSIZE,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+
+    def post(self, url: str, params=None, json=None, headers=None, timeout=None, proxies=None):
+        """
+        Send a POST request over the shared client.
+
+        Args:
+            url: Request URL
+            params, json, headers, timeout: As for requests.post
+            proxies: Per-request proxies; httpx can't set these per request,
+                so such calls go through plain requests.post
+
+        Returns:
+            Response with status_code and text
+        """
+        if proxies:
+            return requests.post(url, params=params, json=json, headers=headers, timeout=timeout, proxies=proxies)
+        return self.client.post(url, params=params, json=json, headers=headers, timeout=timeout)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.client.close()
+
+def create_session() -> Union[Http2Session, requests.Session]:
+    """Create an HTTP/2 session if available, else a Session with a keep-alive connection pool."""
+    if httpx is not None:
+        return Http2Session()
+
+    logger.warning("httpx[http2] is not installed; TradingView requests use HTTP/1.1 "
+                   "(install requirements.txt)")
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE))
+    return session
+
+def install_session(session: Union[Http2Session, requests.Session]):
+    """
+    Route all tradingview_ta HTTP requests through the given session.
+
+    Args:
+        session: Session whose post() replaces requests.post inside tradingview_ta
+    """
+    # tradingview_ta only uses requests.post, which both session types provide
+    tv_main.requests = session
+    protocol = "HTTP/2" if isinstance(session, Http2Session) else "HTTP/1.1"
+    logger.info(f"TradingView requests use a shared {protocol} session (pool size {POOL_MAXSIZE})")
+
+# Global session instance, installed on import and closed at exit
+tv_session = create_session()
+install_session(tv_session)
+atexit.register(tv_session.close)
@@ -1,7 +1,80 @@
+import asyncio
+import logging
+import queue
+import threading
 import streamlit as st
 import vertexai
 from vertexai.generative_models import Part
-from agent import create_chat, get_crypto_analysis, get_stock_analysis, get_forex_analysis, get_index_analysis, get_commodity_analysis, get_multi_timeframe_analysis, get_parabolic_sar_signal
+from agent import create_chat, call_tools, SUPPORTED_SYMBOLS, ALLOWED_SYMBOLS
+from config import config
+from data_fetcher import data_fetcher
+from metrics import start_metrics_server
+
+logger = logging.getLogger(__name__)
+
+# Timeframes loaded for every supported symbol at startup (1h overview plus
+# the Parabolic SAR timeframes), in one batched request per symbol
+PREWARM_INTERVALS = ["1m", "5m", "15m", "1h"]
+
+def _prewarm(chats: queue.SimpleQueue):
+    """
+    Build a chat session (Vertex AI init, auth and tool declarations) and
+    load the supported symbols' data, so the first prompt doesn't wait for either.
+    
+    Args:
+        chats: Queue that receives the ready chat session
+    """
+    try:
+        chats.put(create_chat())
+    except Exception as e:
+        logger.error(f"Error pre-warming chat session: {e}")
+    
+    async def prefetch_all():
+        return await asyncio.gather(
+            *[
+                data_fetcher.prefetch_analyses(symbol, cfg["screener"], cfg["exchange"], PREWARM_INTERVALS)
+                for symbol, cfg in SUPPORTED_SYMBOLS.items()
+            ],
+            return_exceptions=True
+        )
+    
+    try:
+        asyncio.run(prefetch_all())
+    except Exception as e:
+        logger.error(f"Error pre-warming analysis cache: {e}")
+
+@st.cache_resource
+def _start_prewarm() -> queue.SimpleQueue:
+    """
+    Start the pre-warm thread and the metrics endpoint once per server process
+    (Streamlit reruns this script per interaction).
+    """
+    start_metrics_server(config.metrics_port)
+    chats = queue.SimpleQueue()
+    threading.Thread(target=_prewarm, args=(chats,), name="prewarm", daemon=True).start()
+    return chats
+
+def _new_chat():
+    """Take the pre-warmed chat session if it is ready, else create one."""
+    try:
+        return _start_prewarm().get_nowait()
+    except queue.Empty:
+        return create_chat()
+
+def stream_text(responses, function_calls: list):
+    """
+    Yield the text of streamed model response chunks as they arrive.
+    
+    Args:
+        responses: Iterator of response chunks from send_message(..., stream=True)
+        function_calls: List that collects any function calls in the chunks
+    """
+    for chunk in responses:
+        for part in chunk.candidates[0].content.parts:
+            if part.function_call:
+                function_calls.append(part.function_call)
+            elif getattr(part, "text", None):
+                yield part.text
 
 def main():
     st.set_page_config(
@@ -9,6 +82,7 @@ def main():
         page_icon="📈",
         layout="wide"
     )
+    _start_prewarm()
 
     # Simple Password Authentication
     if 'authenticated' not in st.session_state:
@@ -54,7 +128,7 @@ def main():
     if "chat" not in st.session_state:
         with st.spinner("Initializing AI agent..."):
             try:
-                st.session_state.chat = create_chat()
+                st.session_state.chat = _new_chat()
                 st.session_state.messages = []
             except Exception as e:
                 st.error(f"Failed to initialize agent: {e}")
@@ -78,55 +152,38 @@ def main():
             full_response = ""
             
             try:
-                response = st.session_state.chat.send_message(prompt)
+                # Stream any text as it's generated; function calls are collected
+                function_calls = []
+                full_response = message_placeholder.write_stream(
+                    stream_text(st.session_state.chat.send_message(prompt, stream=True), function_calls)
+                )
                 
                 # Handle Function Calls
-                response_parts = response.candidates[0].content.parts
-                function_calls = [part.function_call for part in response_parts if part.function_call]
-                
                 if function_calls:
                     function_responses = []
                     status_text = st.status("Analyzing market data...", expanded=True)
                     
                     for function_call in function_calls:
-                        function_name = function_call.name
-                        function_args = function_call.args
-                        
-                        status_text.write(f"Calling tool: `{function_name}`")
-                        
-                        result = None
-                        if function_name == "get_crypto_analysis":
-                            result = get_crypto_analysis(**function_args)
-                        elif function_name == "get_stock_analysis":
-                            result = get_stock_analysis(**function_args)
-                        elif function_name == "get_forex_analysis":
-                            result = get_forex_analysis(**function_args)
-                        elif function_name == "get_index_analysis":
-                            result = get_index_analysis(**function_args)
-                        elif function_name == "get_commodity_analysis":
-                            result = get_commodity_analysis(**function_args)
-                        elif function_name == "get_multi_timeframe_analysis":
-                            result = get_multi_timeframe_analysis(**function_args)
-                        elif function_name == "get_parabolic_sar_signal":
-                            result = get_parabolic_sar_signal(**function_args)
-                        
+                        status_text.write(f"Calling tool: `{function_call.name}`")
+                    
+                    # Independent tool calls run at the same time
+                    results = call_tools(function_calls, ALLOWED_SYMBOLS)
+                    
+                    for function_call, result in zip(function_calls, results):
                         if result:
                             function_responses.append(
                                 Part.from_function_response(
-                                    name=function_name,
+                                    name=function_call.name,
                                     response={"content": result}
                                 )
                             )
                     
                     if function_responses:
                         status_text.update(label="Analysis complete!", state="complete", expanded=False)
-                        # Send function results back to model
-                        final_response = st.session_state.chat.send_message(function_responses)
-                        full_response = final_response.text
-                else:
-                    full_response = response.text
-                    
-                message_placeholder.markdown(full_response)
+                        # Send function results back to model and stream its answer
+                        full_response = message_placeholder.write_stream(
+                            stream_text(st.session_state.chat.send_message(function_responses, stream=True), [])
+                        )
                 
                 # Add assistant response to state
                 st.session_state.messages.append({"role": "assistant", "content": full_response})